@@ -0,0 +1,132 @@
+"""Measure time to first paint and time to first answer of a cold mini_front process.
+
+The page runs in-process under streamlit.testing's AppTest against the
+query-generator stand-in from benchmarks.fake_query_api and a local MySQL
+loaded with benchmarks.loyalty_data (no SSH tunnel), as in
+benchmarks.load_test. Each run is a fresh interpreter, so imports are cold;
+run it on two checkouts to compare them:
+
+    python -m benchmarks.cold_start --password secret --repeat 5
+"""
+import time
+
+PROCESS_START = time.perf_counter()
+
+import argparse
+import importlib.abc
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.fake_query_api import DEFAULT_WORKLOAD, FakeQueryGenerator, load_workload
+from benchmarks.load_test import DirectTunnel, configure
+
+APP = Path(__file__).resolve().parent.parent / "mini_front.py"
+
+
+class _DirectTunnelHook(importlib.abc.MetaPathFinder):
+    """Points MySQLBackend at the local server when service.MySQLDatabase is first imported,
+    without importing it up front (which would hide its import cost)."""
+
+    def find_spec(self, name, path, target=None):
+        if name != "service.MySQLDatabase":
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        exec_module = spec.loader.exec_module
+
+        def patched(module):
+            exec_module(module)
+            module.MySQLBackend._open_tunnel = lambda backend: DirectTunnel(backend.MYSQL_PORT)
+
+        spec.loader.exec_module = patched
+        return spec
+
+
+def measure(args):
+    """One cold start in this process; returns seconds since interpreter start for each milestone."""
+    from streamlit.testing.v1 import AppTest
+
+    workload = load_workload(args.workload)
+    question = args.question or workload[0]["question"]
+    api = FakeQueryGenerator(workload, args.api_latency, 0.0, seed=0)
+    args.sessions, args.pool_size, args.max_retries, args.warm = 1, 5, 3, False
+    configure(args, api.start(), tempfile.mkdtemp(prefix="cold_start_"))
+    sys.meta_path.insert(0, _DirectTunnelHook())
+
+    timings = {"imports": time.perf_counter() - PROCESS_START}
+    app = AppTest.from_file(str(APP), default_timeout=args.timeout)
+    app.run()
+    timings["first_paint"] = time.perf_counter() - PROCESS_START
+
+    deadline = time.monotonic() + args.timeout
+    outcome = "timeout"
+    if app.text_input:
+        app.text_input[0].input(question)
+    else:
+        # The page failed before rendering the question box
+        outcome = f"exception: {app.exception[0].message}" if app.exception else "no question input"
+        deadline = 0
+    while time.monotonic() < deadline:
+        app.run()
+        if app.exception:
+            outcome = f"exception: {app.exception[0].message}"
+            break
+        if any("found" in element.value for element in app.success):
+            outcome = "answer"
+            break
+        if app.error:
+            outcome = f"error: {app.error[0].value}"
+            break
+        time.sleep(args.poll_interval)
+    else:
+        if deadline and app.warning:
+            outcome = f"timeout: {app.warning[0].value}"
+    timings["first_answer"] = time.perf_counter() - PROCESS_START
+    timings["outcome"] = outcome
+    api.stop()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--question", help="defaults to the first workload question")
+    parser.add_argument("--repeat", type=int, default=3, help="cold processes to start")
+    parser.add_argument("--api-latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=3306, help="local MySQL port")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.once:
+        print(json.dumps(measure(args)))
+        return
+
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--once"] + sys.argv[1:],
+                                capture_output=True, text=True, env=dict(os.environ))
+        lines = output.stdout.strip().splitlines()
+        if output.returncode or not lines:
+            print(output.stderr[-2000:])
+            sys.exit(output.returncode or 1)
+        runs.append(json.loads(lines[-1]))
+        run = runs[-1]
+        print(f"imports {run['imports']:.2f}s  first paint {run['first_paint']:.2f}s  "
+              f"first answer {run['first_answer']:.2f}s  ({run['outcome']})")
+
+    for key in ("imports", "first_paint", "first_answer"):
+        values = sorted(run[key] for run in runs)
+        print(f"{key:<13} median {values[len(values) // 2]:.2f}s  min {values[0]:.2f}s  max {values[-1]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
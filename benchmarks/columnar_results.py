@@ -0,0 +1,92 @@
+"""Compare the DictCursor -> DataFrame path with the columnar path.
+
+Rows are synthesized in the shape pymysql decodes them (tuples of Python values),
+so no database is needed. Usage:
+
+    python -m benchmarks.columnar_results --rows 200000
+"""
+import argparse
+import datetime
+import decimal
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+from pymysql.constants import FIELD_TYPE
+
+from service.columnar import build_frame
+
+DESCRIPTION = [
+    ("company_id", FIELD_TYPE.LONG, None, None, None, None, False),
+    ("company_name", FIELD_TYPE.VAR_STRING, None, None, None, None, False),
+    ("region", FIELD_TYPE.VAR_STRING, None, None, None, None, True),
+    ("points", FIELD_TYPE.NEWDECIMAL, None, None, None, None, False),
+    ("transactions", FIELD_TYPE.LONGLONG, None, None, None, None, False),
+    ("last_purchase", FIELD_TYPE.DATETIME, None, None, None, None, True),
+]
+
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    regions = ["North", "South", "East", "West", None]
+    return [
+        (
+            i,
+            f"Company {rng.randint(1, 50000)}",
+            rng.choice(regions),
+            decimal.Decimal(rng.randint(0, 10 ** 7)) / 100,
+            rng.randint(0, 5000),
+            start + datetime.timedelta(minutes=rng.randint(0, 500000)),
+        )
+        for i in range(count)
+    ]
+
+
+def dict_path(rows):
+    # Mirrors DictCursor + pd.DataFrame(execution_result['rows'], columns=...)
+    names = [desc[0] for desc in DESCRIPTION]
+    dict_rows = [dict(zip(names, row)) for row in rows]
+    return pd.DataFrame(dict_rows, columns=names)
+
+
+def columnar_path(rows, chunk_size=1000):
+    # Mirrors ExecuteQuery.execute_columnar: fetchmany chunks appended to column lists
+    column_values = [[] for _ in DESCRIPTION]
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        for values, column in zip(column_values, zip(*chunk)):
+            values.extend(column)
+    return build_frame(DESCRIPTION, column_values)
+
+
+def measure(name, func, rows, repeat):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        frame = func(rows)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    frame_bytes = int(frame.memory_usage(deep=True).sum())
+    print(f"{name:<10} best {min(timings):8.3f}s  peak {peak / 2 ** 20:9.1f} MiB  "
+          f"frame {frame_bytes / 2 ** 20:8.1f} MiB  dtypes {dict(frame.dtypes.astype(str))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    print(f"{args.rows} rows, {len(DESCRIPTION)} columns")
+    measure("dict", dict_path, rows, args.repeat)
+    measure("columnar", columnar_path, rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
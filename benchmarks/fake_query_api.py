@@ -0,0 +1,145 @@
+"""Local stand-in for the query-generator API.
+
+Answers `generate_query` with the SQL recorded for each question in a workload
+file after a configurable delay, and fails a configurable share of requests
+with HTTP 500 or unusable SQL. Usage (standalone):
+
+    python -m benchmarks.fake_query_api --port 8765 --latency 0.8 --error-rate 0.05
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_WORKLOAD = Path(__file__).with_name("workload.jsonl")
+
+
+def load_workload(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FakeQueryGenerator:
+    """Threaded HTTP server imitating `generate_query` and `user_feedback`."""
+
+    def __init__(self, workload, latency=0.5, jitter=0.5, error_rate=0.0, bad_sql_rate=0.0,
+                 host="127.0.0.1", port=0, seed=None):
+        self.queries = {item["question"]: item["sql"] for item in workload}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bad_sql_rate = bad_sql_rate
+        self._rng = random.Random(seed)
+        self._log_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _draw(self):
+        with self._lock:
+            delay = self.latency * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+            roll = self._rng.random()
+        return max(delay, 0.0), roll
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+                endpoint = self.path.strip("/").split("?")[0]
+                if endpoint == "generate_query":
+                    self._generate_query(params)
+                elif endpoint == "user_feedback":
+                    api._count("feedback")
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"error": f"unknown endpoint {endpoint}"})
+
+            def _generate_query(self, params):
+                delay, roll = api._draw()
+                time.sleep(delay)
+                if roll < api.error_rate:
+                    api._count("http_errors")
+                    self._reply(500, {"error": "injected failure"})
+                    return
+                sql = api.queries.get(params.get("question"))
+                if sql is None:
+                    api._count("unknown_questions")
+                    sql = "I don't know"
+                elif roll < api.error_rate + api.bad_sql_rate:
+                    api._count("bad_sql")
+                    sql = sql.replace("SELECT", "SELEC", 1)
+                api._count("queries")
+                self._reply(200, {"query": sql, "log_id": next(api._log_ids)})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-query-api", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per generate_query")
+    parser.add_argument("--jitter", type=float, default=0.5, help="+/- fraction of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--bad-sql-rate", type=float, default=0.0, help="share of requests answered with broken SQL")
+    args = parser.parse_args()
+
+    api = FakeQueryGenerator(load_workload(args.workload), args.latency, args.jitter, args.error_rate,
+                             args.bad_sql_rate, args.host, args.port)
+    print(f"Serving the query-generator stand-in on {api.base_url}")
+    try:
+        api._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(api.stats())
+
+
+if __name__ == "__main__":
+    main()
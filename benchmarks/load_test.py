@@ -0,0 +1,189 @@
+"""Replay a question workload against get_results with concurrent sessions.
+
+The query-generator API is replaced by the in-process stand-in from
+benchmarks.fake_query_api, and MySQL is a local server loaded with
+benchmarks.loyalty_data (no SSH tunnel). Reports throughput, per-stage
+p50/p99 from service.metrics and process memory. Usage:
+
+    python -m benchmarks.loyalty_data --password secret
+    python -m benchmarks.load_test --password secret --sessions 8 --duration 60 \\
+        --api-latency 0.8 --api-error-rate 0.05 --mode columnar
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.fake_query_api import DEFAULT_WORKLOAD, FakeQueryGenerator, load_workload
+
+
+class DirectTunnel:
+    """Stands in for SSHTunnelForwarder when MySQL listens on localhost."""
+
+    is_active = True
+
+    def __init__(self, port):
+        self.local_bind_port = port
+
+    def stop(self):
+        pass
+
+
+def configure(args, base_url, cache_dir):
+    # Must run before mini_front is imported; ConfigAdapter snapshots the environment
+    os.environ.update({
+        "QUERY_GENERATOR_URL": base_url,
+        "SSH_HOST": "localhost",
+        "SSH_PORT": "22",
+        "SSH_USERNAME": "bench",
+        "SSH_KEY_PATHS": "",
+        "MYSQL_HOST": "127.0.0.1",
+        "MYSQL_PORT": str(args.port),
+        "MYSQL_USER": args.user,
+        "MYSQL_PASSWORD": args.password,
+        "MYSQL_POOL_MAX_SIZE": str(args.pool_size),
+        "MAX_RETRIALS": str(args.max_retries),
+        "QUERY_CACHE_PATH": os.path.join(cache_dir, "query_cache.sqlite3"),
+        "QUERY_CACHE_TTL": "86400" if args.warm else "0",
+        "RESULT_CACHE_TTL": "300" if args.warm else "0",
+        "API_POOL_SIZE": str(max(args.sessions, 10)),
+    })
+
+
+def run_session(get_results, query_executor, workload, args, deadline, seed, outcomes, latencies, lock):
+    rng = random.Random(seed)
+    weights = [item.get("weight", 1) for item in workload]
+    options = {"stream": args.mode == "stream", "columnar": args.mode == "columnar"}
+    while time.monotonic() < deadline:
+        question = rng.choices(workload, weights=weights)[0]["question"]
+        start = time.perf_counter()
+        try:
+            results = get_results(query_executor, question, model_name=args.model, **options)
+            stream = results['execution_result'].get('stream')
+            if stream is not None:
+                try:
+                    for _ in stream:
+                        pass
+                finally:
+                    stream.close()
+            outcome = "success" if results["success"] else (results.get("error_type") or "failure")
+        except Exception as e:
+            outcome = f"exception: {e}"
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append(elapsed)
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+
+
+def rss_mib():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+def report(elapsed, outcomes, latencies, api, metrics, traced_peak):
+    total = sum(outcomes.values())
+    print(f"\n{total} questions in {elapsed:.1f}s -> {total / elapsed:.2f} questions/s")
+    print(f"end-to-end p50 {percentile(latencies, 0.5):.3f}s  p99 {percentile(latencies, 0.99):.3f}s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<40} {count}")
+
+    print(f"\n{'stage':<22}{'outcome':<12}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for (stage, _, outcome), values in sorted(metrics.snapshot().items()):
+        print(f"{stage:<22}{outcome:<12}{values['count']:>8}{values[0.5] * 1000:>10.1f}{values[0.99] * 1000:>10.1f}")
+
+    print(f"\nfake API: {api.stats()}")
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"memory: rss {rss_mib():.1f} MiB, max rss {maxrss:.1f} MiB"
+          + (f", traced peak {traced_peak / 2 ** 20:.1f} MiB" if traced_peak is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between questions per session")
+    parser.add_argument("--mode", choices=["dict", "columnar", "stream"], default="dict")
+    parser.add_argument("--model", default="Amazon Nova Pro")
+    parser.add_argument("--warm", action="store_true", help="keep the question and result caches enabled")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--api-latency", type=float, default=0.5)
+    parser.add_argument("--api-jitter", type=float, default=0.5)
+    parser.add_argument("--api-error-rate", type=float, default=0.0)
+    parser.add_argument("--api-bad-sql-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=3306, help="local MySQL port")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger("load_test")
+    workload = load_workload(args.workload)
+    api = FakeQueryGenerator(workload, args.api_latency, args.api_jitter, args.api_error_rate,
+                             args.api_bad_sql_rate, seed=args.seed)
+    cache_dir = tempfile.mkdtemp(prefix="load_test_")
+    configure(args, api.start(), cache_dir)
+
+    import mini_front
+    from service.MySQLDatabase import DBConnectionManager, ExecuteQuery, MySQLBackend
+    from service.metrics import metrics
+    from service.schema_catalog import SchemaCatalog
+
+    class LocalBackend(MySQLBackend):
+        def _open_tunnel(self):
+            return DirectTunnel(self.MYSQL_PORT)
+
+    class LocalDBConnectionManager(DBConnectionManager):
+        backend_class = LocalBackend
+
+    db_manager = LocalDBConnectionManager(logger=logger)
+    catalog = SchemaCatalog(ExecuteQuery(db_manager, logger=logger).load_catalog, logger=logger)
+    catalog.wait_loaded(timeout=30)
+    query_executor = ExecuteQuery(db_manager, logger=logger, result_cache=mini_front.get_result_cache(),
+                                  cost_gate=mini_front.get_cost_gate(), catalog=catalog)
+
+    outcomes, latencies, lock = Counter(), [], threading.Lock()
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.monotonic()
+    deadline = start + args.duration
+    sessions = [
+        threading.Thread(target=run_session, name=f"session-{i}", args=(
+            mini_front.get_results, query_executor, workload, args, deadline, args.seed + i, outcomes, latencies, lock
+        ))
+        for i in range(args.sessions)
+    ]
+    print(f"{args.sessions} sessions for {args.duration:.0f}s, mode={args.mode}, "
+          f"caches={'on' if args.warm else 'off'}, API latency {args.api_latency}s error rate {args.api_error_rate}")
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    elapsed = time.monotonic() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+
+    report(elapsed, outcomes, latencies, api, metrics, traced_peak)
+    print(f"pool: {db_manager.pool_stats()}")
+    print(f"coalesced: questions {mini_front.get_question_flight().stats()}  sql {query_executor.in_flight.stats()}")
+    db_manager.shutdown()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Load synthetic loyalty-program data into a local MySQL for the load benchmark.
+
+Creates (or recreates) the `loyalty_bench` schema with companies, members and
+transactions tables sized by --companies/--rows. Usage:
+
+    python -m benchmarks.loyalty_data --host 127.0.0.1 --port 3306 --user root --password secret --rows 500000
+"""
+import argparse
+import datetime
+import decimal
+import random
+import time
+
+import pymysql
+
+SCHEMA = "loyalty_bench"
+
+TABLES = {
+    "companies": """
+        CREATE TABLE companies (
+            company_pk INT AUTO_INCREMENT PRIMARY KEY,
+            company_id INT NOT NULL,
+            company_name VARCHAR(128) NOT NULL,
+            region VARCHAR(32),
+            tier VARCHAR(16) NOT NULL,
+            registered_at DATETIME NOT NULL,
+            UNIQUE KEY (company_id)
+        )""",
+    "members": """
+        CREATE TABLE members (
+            member_pk INT AUTO_INCREMENT PRIMARY KEY,
+            member_id INT NOT NULL,
+            company_id INT NOT NULL,
+            email VARCHAR(128) NOT NULL,
+            points_balance DECIMAL(12, 2) NOT NULL,
+            joined_at DATETIME NOT NULL,
+            UNIQUE KEY (member_id),
+            KEY (company_id)
+        )""",
+    "transactions": """
+        CREATE TABLE transactions (
+            transaction_pk BIGINT AUTO_INCREMENT PRIMARY KEY,
+            transaction_id BIGINT NOT NULL,
+            member_id INT NOT NULL,
+            company_id INT NOT NULL,
+            product_line VARCHAR(32) NOT NULL,
+            amount DECIMAL(10, 2) NOT NULL,
+            points INT NOT NULL,
+            created_at DATETIME NOT NULL,
+            KEY (company_id),
+            KEY (created_at)
+        )""",
+}
+
+REGIONS = ["North", "South", "East", "West", None]
+TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+PRODUCT_LINES = ["Printers", "Ink", "Projectors", "Scanners", "Paper", "Services"]
+
+
+def company_rows(count, rng):
+    start = datetime.datetime(2018, 1, 1)
+    for company_id in range(1, count + 1):
+        yield (
+            company_id,
+            f"Company {company_id:05d}",
+            rng.choice(REGIONS),
+            rng.choices(TIERS, weights=[50, 30, 15, 5])[0],
+            start + datetime.timedelta(days=rng.randint(0, 2500)),
+        )
+
+
+def member_rows(count, companies, rng):
+    start = datetime.datetime(2019, 1, 1)
+    for member_id in range(1, count + 1):
+        yield (
+            member_id,
+            rng.randint(1, companies),
+            f"member{member_id}@example.com",
+            decimal.Decimal(rng.randint(0, 10 ** 6)) / 100,
+            start + datetime.timedelta(minutes=rng.randint(0, 3_000_000)),
+        )
+
+
+def transaction_rows(count, members, companies, rng):
+    start = datetime.datetime(2023, 1, 1)
+    for transaction_id in range(1, count + 1):
+        amount = decimal.Decimal(rng.randint(500, 500_000)) / 100
+        yield (
+            transaction_id,
+            rng.randint(1, members),
+            rng.randint(1, companies),
+            rng.choice(PRODUCT_LINES),
+            amount,
+            int(amount) // 10,
+            start + datetime.timedelta(minutes=rng.randint(0, 1_000_000)),
+        )
+
+
+def insert(connection, table, columns, rows, batch_size):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            cursor.executemany(sql, batch)
+    connection.commit()
+
+
+def load(connection, companies, members, transactions, batch_size=5000, seed=0):
+    rng = random.Random(seed)
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {SCHEMA}")
+        cursor.execute(f"USE {SCHEMA}")
+        for table, ddl in TABLES.items():
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(ddl)
+
+    insert(connection, "companies", ["company_id", "company_name", "region", "tier", "registered_at"],
+           company_rows(companies, rng), batch_size)
+    insert(connection, "members", ["member_id", "company_id", "email", "points_balance", "joined_at"],
+           member_rows(members, companies, rng), batch_size)
+    insert(connection, "transactions",
+           ["transaction_id", "member_id", "company_id", "product_line", "amount", "points", "created_at"],
+           transaction_rows(transactions, members, companies, rng), batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--members", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=500000, help="transactions to generate")
+    args = parser.parse_args()
+
+    connection = pymysql.connect(host=args.host, port=args.port, user=args.user, password=args.password)
+    start = time.perf_counter()
+    try:
+        load(connection, args.companies, args.members, args.rows)
+    finally:
+        connection.close()
+    print(f"Loaded {args.companies} companies, {args.members} members, {args.rows} transactions "
+          f"into {SCHEMA} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
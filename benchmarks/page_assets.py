@@ -0,0 +1,56 @@
+"""Measure the per-rerun cost of the page's static CSS/HTML fragments.
+
+Compares the old path (read and base64-encode every image and rebuild the CSS
+on each rerun) with the cached asset layer. Usage:
+
+    python -m benchmarks.page_assets --reruns 200
+"""
+import argparse
+import base64
+import logging
+import time
+
+# Streamlit warns about the missing script run context when imported bare
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import mini_front  # noqa: E402
+
+
+def legacy_rerun():
+    def get_image_base64(image_path):
+        with open(image_path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode()
+
+    assets = mini_front.assets_path
+    return [
+        mini_front.build_page_css(),
+        mini_front.LOGO_HTML.format(get_image_base64(str(assets / "cesar.png")),
+                                    get_image_base64(str(assets / "epson.png"))),
+        mini_front.TIPS_HTML.format(alert=get_image_base64(str(assets / "alert-circle.png"))),
+    ]
+
+
+def cached_rerun():
+    return [mini_front.page_css(), mini_front.logo_html(), mini_front.tips_html()]
+
+
+def measure(name, func, reruns):
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(reruns):
+        fragments = func()
+    per_rerun = (time.perf_counter() - start) / reruns
+    sent = sum(len(fragment.encode()) for fragment in fragments)
+    print(f"{name:<8} {per_rerun * 1e6:10.1f} us/rerun  {sent / 1024:8.1f} KiB sent/rerun")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=200)
+    args = parser.parse_args()
+    measure("legacy", legacy_rerun, args.reruns)
+    measure("cached", cached_rerun, args.reruns)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,25 @@
 import streamlit as st
-import requests
-import pandas as pd
-from service.MySQLDatabase import DBConnectionManager, ExecuteQuery
+from service.config_adapter import ConfigAdapter
+from service.query_cache import QuestionCache, normalize_question
+from service.background_init import BackgroundInit
+from service.assets import AssetStore, minify_css
+from service.speculative import SpeculativeGenerator
+from service.factory import build_cost_gate, build_executor, build_result_cache
+from service.metrics import metrics
+from service.error_log import ErrorLog
+from service.prewarm import PrewarmScheduler, parse_window
+from service.jobs import Job, JobExecutor, SystemBusyError, current_job
+from service.projection import is_hidden_column
+from service.single_flight import SingleFlight
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from pathlib import Path
 from os import getcwd
-import base64
 import logging
+import tempfile
 import time
+import uuid
+from functools import partial
 
 assets_path = Path(getcwd()) / "assets"
 
@@ -25,7 +38,8 @@ DARK_GREY = "#4E4E4E"
 
 st.set_page_config(page_title="EPSON Loyalty Intelligence - Query Assistant", page_icon="./assets/ELI.png", layout="wide")
 
-st.markdown(f"""
+def build_page_css():
+    return f"""
 <style>
     #root {{
         h1, h2, h3, p, span, div, button, input, select, li {{
@@ -215,16 +229,59 @@ st.markdown(f"""
         color: {DARK_BLUE};
     }}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def page_css():
+    return minify_css(build_page_css())
 
-def get_image_base64(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode()
+st.markdown(page_css(), unsafe_allow_html=True)
 
-headers = {'Content-Type': 'application/json'}
-base_url = 'https://k9tfd4slid.execute-api.us-east-1.amazonaws.com/lrn-ai-queryGenerator-beta/'
-generate_query = f'{base_url}generate_query'
-save_feedback = f'{base_url}user_feedback'
+LOGO_WIDTH = 80
+
+LOGO_HTML = """
+        <div class="logo-container">
+            <img src="data:image/png;base64,{}" width="80">
+            <img src="data:image/png;base64,{}" width="80">
+        </div>
+        """
+
+TIPS_HTML = """
+        <h3 class="tips">Tips for asking good questions</h3>
+        <ul>
+        <li>
+            <div class="alert-icon">
+                <img src="data:image/png;base64,{alert}" width="24">
+            </div>
+            Be specific about what information you need from the EPSON Loyalty + Rewards program</li>
+        <li>
+            <div class="alert-icon">
+                <img src="data:image/png;base64,{alert}" width="24">
+            </div>
+            Include time periods or other details in your question when relevant</li>
+        </ul>
+        
+        <p class="example" style="margin-left: 15px"><em>Example: "How many companies were registered last year?"</em></p>
+        """
+
+@st.cache_resource
+def get_asset_store():
+    return AssetStore(assets_path)
+
+def logo_html():
+    assets = get_asset_store()
+    return assets.fragment("logo", ("cesar.png", "epson.png"),
+                           lambda: LOGO_HTML.format(assets.base64("cesar.png", width=LOGO_WIDTH * 2),
+                                                    assets.base64("epson.png", width=LOGO_WIDTH * 2)))
+
+def tips_html():
+    assets = get_asset_store()
+    return assets.fragment("tips", ("alert-circle.png",),
+                           lambda: TIPS_HTML.format(alert=assets.base64("alert-circle.png")))
+
+base_url = ConfigAdapter().get_config(
+    'QUERY_GENERATOR_URL', 'https://k9tfd4slid.execute-api.us-east-1.amazonaws.com/lrn-ai-queryGenerator-beta/'
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -235,34 +292,310 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def get_question_cache():
+    config = ConfigAdapter()
+    return QuestionCache(
+        config.get_config('QUERY_CACHE_PATH', 'query_cache.sqlite3'),
+        logger=logger,
+        ttl=float(config.get_config('QUERY_CACHE_TTL', 86400)),
+        max_entries=int(config.get_config('QUERY_CACHE_MAX_ENTRIES', 1000)),
+    )
+
+@st.cache_resource
+def get_question_flight():
+    return SingleFlight('question')
+
+@st.cache_resource
+def get_result_cache():
+    return build_result_cache()
+
+@st.cache_resource
+def get_cost_gate():
+    return build_cost_gate(logger)
+
+def build_query_executor(result_cache, cost_gate):
+    """Talk to the shared query gateway when QUERY_GATEWAY_SOCKET is set, otherwise to MySQL directly."""
+    # Heavy imports (pymysql, paramiko, sshtunnel, pandas) happen here, off the first render
+    from service.MySQLDatabase import DBConnectionManager, ExecuteQuery
+
+    socket_path = ConfigAdapter().get_config('QUERY_GATEWAY_SOCKET', '')
+    if socket_path:
+        return ExecuteQuery.client(socket_path, logger=logger)
+    return build_executor(DBConnectionManager(logger=logger), logger, result_cache=result_cache, cost_gate=cost_gate)
+
+@st.cache_resource
+def start_query_executor():
+    """Open the tunnel and connections on a background thread as soon as the server serves its first page."""
+    config = ConfigAdapter()
+    return BackgroundInit(
+        partial(build_query_executor, get_result_cache(), get_cost_gate()),
+        logger=logger,
+        name="db-warmup",
+        retry_interval=float(config.get_config('DB_WARMUP_RETRY_INTERVAL', 10)),
+    )
+
+@st.fragment(run_every=1)
+def show_connection_status(executor_init):
+    """Shown while the database connection is being set up; reruns the page once it is ready."""
+    if executor_init.ready:
+        st.rerun()
+    executor_init.retry_if_failed()
+    if executor_init.error is not None:
+        st.warning("We can't reach the database right now. Retrying...")
+    else:
+        st.info(f"Connecting to the database... {time.monotonic() - executor_init.started_at:.0f}s")
+
+@st.cache_resource
+def get_http_client():
+    from service.query_generator_client import QueryGeneratorClient
+
+    config = ConfigAdapter()
+    return QueryGeneratorClient(
+        base_url,
+        logger=logger,
+        connect_timeout=float(config.get_config('API_CONNECT_TIMEOUT', 3.05)),
+        read_timeout=float(config.get_config('API_READ_TIMEOUT', 60)),
+        max_retries=int(config.get_config('API_MAX_RETRIES', 2)),
+        pool_size=int(config.get_config('API_POOL_SIZE', 10)),
+    )
+
+@st.cache_resource
+def get_feedback_queue():
+    from service.query_generator_client import FeedbackQueue
+
+    config = ConfigAdapter()
+    return FeedbackQueue(
+        get_http_client(),
+        logger=logger,
+        max_size=int(config.get_config('FEEDBACK_QUEUE_SIZE', 1000)),
+        batch_size=int(config.get_config('FEEDBACK_BATCH_SIZE', 20)),
+    )
+
+@st.cache_resource
+def get_speculative_generator():
+    config = ConfigAdapter()
+    return SpeculativeGenerator(
+        get_generated_query,
+        logger=logger,
+        max_workers=int(config.get_config('SPECULATIVE_MAX_WORKERS', 8)),
+    )
+
+@st.cache_resource
+def get_error_log():
+    config = ConfigAdapter()
+    return ErrorLog(
+        config.get_config('ERROR_LOG_PATH', 'error_log.csv'),
+        logger=logger,
+        fmt=config.get_config('ERROR_LOG_FORMAT', 'csv'),
+        max_size=int(config.get_config('ERROR_LOG_QUEUE_SIZE', 10000)),
+        max_bytes=int(config.get_config('ERROR_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        rotate_interval=float(config.get_config('ERROR_LOG_ROTATE_INTERVAL', 86400)),
+        backups=int(config.get_config('ERROR_LOG_BACKUPS', 5)),
+    )
+
+@st.cache_resource
+def start_metrics_endpoint():
+    config = ConfigAdapter()
+    metrics.logger = logger
+    port = int(config.get_config('METRICS_PORT', 9108))
+    if port:
+        metrics.start_server(config.get_config('METRICS_HOST', '127.0.0.1'), port)
+    return metrics
+
+@st.cache_resource
+def start_prewarmer(_query_executor, columnar=False):
+    """Keep answers to the most frequent questions fresh in the caches; None when disabled."""
+    config = ConfigAdapter()
+    if config.get_config('PREWARM_ENABLED', 'false').lower() != 'true':
+        return None
+    result_ttl = float(config.get_config('PREWARM_RESULT_TTL', 86400))
+    lookback = float(config.get_config('PREWARM_LOOKBACK_DAYS', 7)) * 86400
+    return PrewarmScheduler(
+        lambda question, model_name: get_results(_query_executor, question, model_name=model_name,
+                                                 columnar=columnar, cache_ttl=result_ttl),
+        lambda limit: get_question_cache().top_questions(limit, lookback),
+        logger=logger,
+        interval=float(config.get_config('PREWARM_INTERVAL', 3600)),
+        top_n=int(config.get_config('PREWARM_TOP_N', 20)),
+        concurrency=int(config.get_config('PREWARM_CONCURRENCY', 2)),
+        window=parse_window(config.get_config('PREWARM_WINDOW', '')),
+    )
+
+@st.cache_resource
+def get_job_executor():
+    config = ConfigAdapter()
+    return JobExecutor(
+        logger=logger,
+        workers=int(config.get_config('JOB_WORKERS', 8)),
+        llm_concurrency=int(config.get_config('JOB_LLM_CONCURRENCY', 4)),
+        db_concurrency=int(config.get_config('JOB_DB_CONCURRENCY', 5)),
+        export_concurrency=int(config.get_config('JOB_EXPORT_CONCURRENCY', 1)),
+        max_queue=int(config.get_config('JOB_QUEUE_SIZE', 50)),
+        max_per_user=int(config.get_config('JOB_MAX_PER_USER', 2)),
+    )
+
+@st.cache_resource
+def get_result_store():
+    from service.result_store import ResultStore
+
+    config = ConfigAdapter()
+    return ResultStore(
+        config.get_config('RESULT_SPILL_DIR', str(Path(tempfile.gettempdir()) / 'eli_results')),
+        logger=logger,
+        max_bytes=int(config.get_config('RESULT_MEMORY_BUDGET', 512 * 1024 * 1024)),
+        is_active=lambda session_id: runtime.exists() and runtime.get_instance().is_active_session(session_id),
+        session_grace=float(config.get_config('RESULT_SESSION_GRACE', 120)),
+    )
+
+def keep_result(query_results, execution_result):
+    """Hand the rows to the shared result store; session state keeps only a handle and the metadata."""
+    from service.result_store import DATA_KEYS
+
+    query_results['result_handle'] = get_result_store().put(get_script_run_ctx().session_id, execution_result)
+    query_results['execution_result'] = {key: value for key, value in execution_result.items() if key not in DATA_KEYS}
+
+def describe_age(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f} seconds"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f} minutes"
+    return f"{seconds / 3600:.1f} hours"
+
 def get_generated_query(question, model_name='Amazon Nova Pro'):
-        params = {
-            'question': question,
-            'model_name': model_name,
-        }
-        response = requests.get(generate_query, json=params, headers=headers)
-        if response.status_code == 200 and 'query' in response.json():
-           return response.json()
+    with get_job_executor().limit('llm'), metrics.span('llm_call', model=model_name) as span:
+        response = get_http_client().generate_query(question, model_name)
+        if response is None:
+            span['outcome'] = 'invalid'
+        return response
         
 def post_feedback(feedback, log_id):
+    """Queue feedback for the background poster; returns False if it was dropped."""
     try:
-        params = {
-            'feedback': feedback,
-            'log_id': log_id,
-        }
-        response = requests.get(save_feedback, json=params, headers=headers)
-        return response.status_code == 200
+        if feedback == "negative":
+            get_question_cache().invalidate_log_id(log_id)
+        return get_feedback_queue().submit(feedback, log_id)
     except Exception as e:
         logger.exception(f"Error posting feedback: {e}")
         return False
     
-def get_results(query_executor, user_question, model_name='Amazon Nova Pro'):    
+def get_results(query_executor, user_question, model_name='Amazon Nova Pro', **options):
+    """Answer a question, recording the end-to-end latency per model and outcome.
+
+    Sessions asking the same question of the same model at the same time share one answer.
+    Streamed answers are not shared, as a row stream has a single reader.
+    """
+    answer = partial(_answer, query_executor, user_question, model_name, **options)
+    if options.get('stream'):
+        return answer()
+    key = (normalize_question(user_question), model_name,
+           tuple(sorted((name, value) for name, value in options.items() if name != 'cancel_token')))
+    results, shared = get_question_flight().do(key, answer)
+    if shared and results.get('error_type') == 'cancelled' and not query_executor.is_cancelled(options.get('cancel_token')):
+        # The session that asked first pressed Stop; this one did not
+        return get_results(query_executor, user_question, model_name, **options)
+    # Every session gets its own copy, the first one included: keep_result rewrites it in place
+    results = dict(results)
+    if 'execution_result' in results:
+        results['execution_result'] = dict(results['execution_result'])
+    return results
+
+def _answer(query_executor, user_question, model_name, **options):
+    with metrics.model(model_name), metrics.span('answer') as span:
+        results = _get_results(query_executor, user_question, model_name=model_name, **options)
+        span['outcome'] = 'success' if results['success'] else (results.get('error_type') or 'failure')
+        return results
+
+def _get_results(query_executor, user_question, model_name='Amazon Nova Pro', stream=False, columnar=False, cancel_token=None, speculative=False, cache_ttl=None):    
     attempts = 0
     success = False
     queries_attempted = []  # Store queries for each attempt
-    MAX_RETRIALS = int(query_executor.db_manager._config_adapter.get_config('MAX_RETRIALS'))
+    MAX_RETRIALS = int(ConfigAdapter().get_config('MAX_RETRIALS'))
+    if stream:
+        execute = query_executor.execute_stream
+    elif columnar:
+        execute = query_executor.execute_columnar
+    else:
+        execute = query_executor.execute
+    execute = partial(execute, cancel_token=cancel_token)
+    if cache_ttl is not None:
+        # Pre-warming: skip cached results and keep the fresh ones for cache_ttl
+        execute = partial(execute, cache_ttl=cache_ttl)
+    query, log_id, execution_result, query_generation_time = None, None, {}, 0.0
+
+    def execute_checked(sql):
+        """Run the EXPLAIN cost gate, then execute the (possibly LIMITed) query."""
+        with get_job_executor().limit('db'):
+            preflight = query_executor.preflight(sql)
+            if preflight['action'] == 'reject':
+                return {'error': preflight['reason'], 'error_type': preflight['error_type']}
+            result = execute(preflight['query'])
+            if result.get('error_type') == 'sql' and preflight.get('unpruned'):
+                # The rewritten projection failed (e.g. the catalog is behind the schema); run it as generated
+                result = execute(preflight['unpruned'])
+                preflight['query'] = preflight['unpruned']
+        if preflight['query'] != sql:
+            result['executed_query'] = preflight['query']
+        return result
+
+    # Reuse SQL that already answered this question successfully
+    question_cache = get_question_cache()
+    cached = question_cache.get(user_question, model_name)
+    if cached:
+        start_time = time.time()
+        with get_job_executor().limit('db'):
+            execution_result = execute(cached['query'])
+        if 'error' not in execution_result:
+            return {
+                'success': True,
+                'log_id': cached['log_id'],
+                'query': cached['query'],
+                'queries_attempted': [(1, cached['query'])],
+                'execution_result': execution_result,
+                'query_generation_time': time.time() - start_time,
+                'from_cache': True,
+            }
+        if execution_result.get('error_type') != 'sql':
+            # Timeouts, cancellations and connection failures are not the SQL's fault and would
+            # hit new SQL just the same; keep the entry and report the failure
+            return {
+                'success': False,
+                'log_id': cached['log_id'],
+                'query': cached['query'],
+                'queries_attempted': [(1, cached['query'])],
+                'execution_result': execution_result,
+                'query_generation_time': time.time() - start_time,
+                'error_type': execution_result.get('error_type'),
+                'from_cache': True,
+            }
+        question_cache.invalidate(user_question, model_name)
+
+    if speculative:
+        # Race every configured model and keep the first candidate that executes
+        config = ConfigAdapter()
+        models = [model.strip() for model in config.get_config('SPECULATIVE_MODELS', 'Amazon Nova Pro,gpt-4o-mini').split(',')]
+        start_time = time.time()
+        outcome = get_speculative_generator().run(
+            user_question, models, int(config.get_config('SPECULATIVE_SAMPLES', 1)), execute_checked
+        )
+        if outcome['success']:
+            # Attributed to the model that wrote the winning SQL, which may not be the selected one
+            question_cache.put(user_question, outcome['model'], outcome['query'], outcome['log_id'])
+        return {
+            'success': outcome['success'],
+            'log_id': outcome['log_id'],
+            'query': outcome['query'],
+            'queries_attempted': outcome['queries_attempted'],
+            'execution_result': outcome['execution_result'],
+            'query_generation_time': time.time() - start_time,
+            'error_type': outcome['execution_result'].get('error_type'),
+            'model': outcome['model'],
+        }
 
     while attempts < MAX_RETRIALS and not success:
+        if query_executor.is_cancelled(cancel_token):
+            execution_result = {'error': 'Query was cancelled', 'error_type': 'cancelled'}
+            break
         start_time = time.time()  # Start the timer
 
         # Gen query
@@ -273,7 +606,8 @@ def get_results(query_executor, user_question, model_name='Amazon Nova Pro'):
             raise Exception("I don't know")
 
         # Execute query
-        execution_result = query_executor.execute(query)
+        execution_result = execute_checked(query)
+        query = execution_result.get('executed_query', query)
         end_time = time.time()  # End the timer
         attempts += 1
         queries_attempted.append((attempts, query))
@@ -283,6 +617,13 @@ def get_results(query_executor, user_question, model_name='Amazon Nova Pro'):
                     
         query_generation_time = end_time - start_time
 
+        # A timed-out or cancelled query is not a bad query to regenerate
+        if execution_result.get('error_type') in ('timeout', 'cancelled'):
+            break
+
+    if success:
+        question_cache.put(user_question, model_name, query, log_id)
+
     return {
         'success': success,
         'log_id': log_id,
@@ -290,11 +631,156 @@ def get_results(query_executor, user_question, model_name='Amazon Nova Pro'):
         'queries_attempted': queries_attempted,
         'execution_result': execution_result,
         'query_generation_time': query_generation_time,
+        'error_type': execution_result.get('error_type'),
     }
 
+STAGE_LABELS = {
+    Job.QUEUED: "Waiting in line",
+    Job.RUNNING: "Working on it",
+    'waiting:llm': "Waiting for the query generator",
+    'llm': "Writing the query",
+    'waiting:db': "Waiting for the database",
+    'db': "Running the query",
+}
+
+def wait_for_job(job, status, poll_interval=0.25):
+    """Poll a queued job, showing its queue position and stage. A Stop click reruns the
+    script, which interrupts the polling below at the next Streamlit call and cancels the job."""
+    start_time = time.time()
+    try:
+        while not job.wait(poll_interval):
+            position = job.position
+            label = f"{STAGE_LABELS[Job.QUEUED]} (position {position})" if position else STAGE_LABELS.get(job.stage, STAGE_LABELS[Job.RUNNING])
+            progress = f" ({job.progress})" if job.progress else ""
+            status.caption(f"{label}...{progress} {time.time() - start_time:.0f}s")
+    finally:
+        status.empty()
+        if not job.done:
+            job.cancel()
+    if job.error is not None:
+        raise job.error
+    if job.status == Job.CANCELLED:
+        return {'success': False, 'error_type': 'cancelled', 'queries_attempted': [], 'query': None}
+    return job.result
+
+def stop_query(query_executor, cancel_token):
+    query_executor.cancel(cancel_token)
+    st.session_state.query_results = {'success': False, 'error_type': 'cancelled', 'queries_attempted': [], 'query': None}
+
+def build_dataframe(execution_result):
+    import pandas as pd
+
+    with metrics.span('dataframe_build'):
+        if execution_result.get('frame') is not None:
+            df = execution_result['frame']
+        else:
+            df = pd.DataFrame(execution_result['rows'], columns=execution_result['columns'])
+        df = df.loc[:, [not is_hidden_column(col) for col in df.columns]]
+        return df.reset_index(drop=True)
+
+def consume_stream(execution_result, table):
+    """Render the first chunk as soon as it arrives, then collect the rest."""
+    stream = execution_result['stream']
+    rows = []
+    try:
+        for chunk in stream:
+            first_chunk = not rows
+            rows.extend(chunk)
+            if first_chunk:
+                table.dataframe(build_dataframe({'columns': execution_result['columns'], 'rows': rows}),
+                                use_container_width=True, hide_index=True)
+    finally:
+        stream.close()
+    if stream.error:
+        logger.warning(f"Result stream ended early: {stream.error}")
+    return {
+        "columns": execution_result['columns'],
+        "rows": rows,
+        "execution_time": stream.execution_time,
+        "row_count": stream.row_count,
+        "truncated": stream.truncated,
+    }
+
+EXPORT_MIME_TYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+def export_results(query_executor, query, fmt, cancel_token=None):
+    """Run `query` again without row caps and write it to a file chunk by chunk; runs on a job worker."""
+    from service.export import export_stream, remove_old_exports
+
+    config = ConfigAdapter()
+    directory = Path(config.get_config('EXPORT_DIR', Path(tempfile.gettempdir()) / 'eli_exports'))
+    directory.mkdir(parents=True, exist_ok=True)
+    remove_old_exports(directory, float(config.get_config('EXPORT_RETENTION', 3600)))
+    path = directory / f"{uuid.uuid4().hex}.{fmt}"
+    job = current_job.get()
+
+    def report(rows, size):
+        if job is not None:
+            job.progress = f"{rows:,} rows, {size / 2 ** 20:.1f} MB"
+
+    with get_job_executor().limit('export'):
+        result = query_executor.execute_stream(query, max_rows=0, max_bytes=0, cancel_token=cancel_token,
+                                               timeout=float(config.get_config('EXPORT_TIMEOUT', 1800)), as_tuples=True)
+        if 'error' in result:
+            return result
+        with metrics.span('export', format=fmt) as span:
+            export = export_stream(result, str(path), fmt, progress=report)
+            if export['error']:
+                span['outcome'] = 'failure'
+                path.unlink(missing_ok=True)
+    return export
+
+def read_export(path):
+    return Path(path).read_bytes()
+
+def show_export(query_executor, query, key):
+    """'Download full results': export in the background with progress, then offer the file."""
+    from service.export import FORMATS as EXPORT_FORMATS
+
+    export = st.session_state.query_results.get('export')
+    if export is None or export.get('error_type'):
+        if export is not None:
+            st.warning("We couldn't export the full results." if export.get('error_type') != 'cancelled' else "The export was stopped.")
+        col_format, col_button = st.columns([1, 3])
+        with col_format:
+            fmt = st.radio("Format", EXPORT_FORMATS, horizontal=True, key=f"export_format_{key}", label_visibility="collapsed")
+        with col_button:
+            if not st.button("Download full results", key=f"export_{key}"):
+                return
+        cancel_token = uuid.uuid4().hex
+        st.button("Stop export", key=f"stop_export_{cancel_token}", on_click=query_executor.cancel, args=(cancel_token,))
+        try:
+            job = get_job_executor().submit(
+                st.session_state.user_id,
+                lambda: export_results(query_executor, query, fmt, cancel_token),
+                on_cancel=lambda: query_executor.cancel(cancel_token),
+            )
+        except SystemBusyError:
+            st.warning("The system is busy right now. Please try again in a moment.")
+            return
+        st.session_state.query_results['export'] = wait_for_job(job, status=st.empty())
+        st.rerun()
+    else:
+        st.download_button(
+            f"Save {export['rows']:,} rows as {export['format'].upper()} ({export['bytes'] / 2 ** 20:.1f} MB)",
+            data=partial(read_export, export['path']),
+            file_name=f"results.{export['format']}",
+            mime=EXPORT_MIME_TYPES[export['format']],
+            key=f"save_export_{key}",
+            on_click="ignore",
+        )
+
 def main():
-    db_manager = DBConnectionManager(logger=logger)
-    query_executor = ExecuteQuery(db_manager, logger=logger)
+    start_metrics_endpoint()
+    executor_init = start_query_executor()
+    query_executor = executor_init.result  # None until the database connection is ready
+    config = ConfigAdapter()
+    stream_results = config.get_config('STREAM_RESULTS', 'false').lower() == 'true'
+    columnar_results = config.get_config('COLUMNAR_RESULTS', 'false').lower() == 'true'
+    speculative = config.get_config('SPECULATIVE_MODE', 'false').lower() == 'true'
+    stale_after = float(config.get_config('RESULT_STALE_AFTER', 3600))
+    if query_executor is not None:
+        start_prewarmer(query_executor, columnar=columnar_results)
     col_title, col_logo = st.columns([5, 1])
     
     with col_title:
@@ -318,15 +804,7 @@ def main():
         </style>
         """, unsafe_allow_html=True)
 
-        st.markdown("""
-        <div class="logo-container">
-            <img src="data:image/png;base64,{}" width="80">
-            <img src="data:image/png;base64,{}" width="80">
-        </div>
-        """.format(
-            get_image_base64(str(assets_path / "cesar.png")),
-            get_image_base64(str(assets_path / "epson.png"))
-        ), unsafe_allow_html=True)
+        st.markdown(logo_html(), unsafe_allow_html=True)
 
 
     col1, col2, col3 = st.columns([1, 20, 1])
@@ -365,6 +843,8 @@ def main():
 
         if 'query_results' not in st.session_state:
             st.session_state.query_results = None
+        if 'user_id' not in st.session_state:
+            st.session_state.user_id = uuid.uuid4().hex
         
         col_input, col_btn = st.columns([3, 1])
         with col_input:
@@ -379,85 +859,138 @@ def main():
             if st.button("Get answer", use_container_width=True):
                 st.session_state.query_results = None
 
-        # If the user has asked a question and the query is ready to run, execute the query
+        if query_executor is None:
+            show_connection_status(executor_init)
+
+        # If the user has asked a question, run it once the database is ready
         if user_question:
-            with st.spinner("Finding your answer..."):
-                try:
-                    # If the query results haven't been fetched yet, get them
-                    if st.session_state.query_results is None:
-                        st.session_state.query_results = get_results(query_executor, user_question, model_name=st.session_state.selected_model)
-
-                    # If the query was successful, display the results
-                    if st.session_state.query_results and st.session_state.query_results['success']:
-                        log_id = st.session_state.query_results['log_id']
-                        query = st.session_state.query_results['query']
-                        execution_result = st.session_state.query_results['execution_result']
-                        attempts = len(st.session_state.query_results['queries_attempted'])
+            if query_executor is None:
+                # show_connection_status reruns the page once connected, which answers it
+                st.caption("Your question will be answered as soon as the database is connected.")
+            else:
+                with st.spinner("Finding your answer..."):
+                    try:
+                        # If the query results haven't been fetched yet, get them
+                        if st.session_state.query_results is None:
+                            cancel_token = uuid.uuid4().hex
+                            get_question_cache().record_ask(user_question, st.session_state.selected_model)
+                            st.button("Stop", key=f"stop_{cancel_token}", on_click=stop_query, args=(query_executor, cancel_token))
+                            model_name = st.session_state.selected_model
+                            try:
+                                job = get_job_executor().submit(
+                                    st.session_state.user_id,
+                                    lambda: get_results(query_executor, user_question, model_name=model_name,
+                                                        stream=stream_results, columnar=columnar_results, cancel_token=cancel_token,
+                                                        speculative=speculative),
+                                    on_cancel=lambda: query_executor.cancel(cancel_token),
+                                )
+                            except SystemBusyError:
+                                st.session_state.query_results = {'success': False, 'error_type': 'busy', 'queries_attempted': [], 'query': None}
+                            else:
+                                st.session_state.query_results = wait_for_job(job, status=st.empty())
+                                results = st.session_state.query_results
+                                if results['success']:
+                                    execution_result = results['execution_result']
+                                    if execution_result.get('streaming'):
+                                        # Read it in this run: a stream kept in session state holds a pooled
+                                        # connection until the session reruns, which it may never do
+                                        execution_result = consume_stream(execution_result, st.empty())
+                                    keep_result(results, execution_result)
+                            st.rerun()  # Redraw without the Stop button
+
+                        # If the query was successful, display the results
+                        if st.session_state.query_results and st.session_state.query_results['success']:
+                            log_id = st.session_state.query_results['log_id']
+                            query = st.session_state.query_results['query']
+                            execution_result = st.session_state.query_results['execution_result']
+                            if 'result_handle' in st.session_state.query_results:
+                                execution_result = get_result_store().get(st.session_state.query_results['result_handle'])
+                                if execution_result is None:
+                                    # Dropped while the session was away; answer the question again
+                                    st.session_state.query_results = None
+                                    st.rerun()
+                            attempts = len(st.session_state.query_results['queries_attempted'])
                     
-                        st.success("Here's what we found:")
+                            st.success("Here's what we found:")
                                     
-                        with st.expander("View the technical details"):
-                            st.subheader("SQL Queries for Each Attempt:")
-                            for attempt_num, attempted_query in st.session_state.query_results['queries_attempted']:
-                                st.text(f"Attempt {attempt_num}:")
-                                st.code(attempted_query, language="sql")
-
-                        col_result, col_thumbs_up, col_thumbs_down = st.columns([9, 0.5, 0.5])
-
-                        with col_result:
-                            st.subheader("Results:")
-
-                        if 'feedback' not in st.session_state.query_results:
-                            with col_thumbs_up:
-                                if st.button("👍", key=f"thumbs_up_{log_id}", disabled=('feedback' in st.session_state.query_results)):
-                                    post_feedback("positive", log_id)
-                                    st.session_state.query_results['feedback'] = "positive"
-                                    st.rerun()
-
-                            with col_thumbs_down:
-                                if st.button("👎", key=f"thumbs_down_{log_id}", disabled=('feedback' in st.session_state.query_results)):
-                                    post_feedback("negative", log_id)
-                                    st.session_state.query_results['feedback'] = "positive"
-                                    st.rerun()
-
-                        df = pd.DataFrame(execution_result['rows'], columns=execution_result['columns'])
-                        df = df[[col for col in df.columns if '_id' not in col.lower() and '_pk' not in col.lower()]]
-                        df = df.reset_index(drop=True)
-                        st.dataframe(df, use_container_width=True, hide_index=True)
-
-                        col1, col2, col3 = st.columns([1, 1, 1])
-                        with col1:
-                            st.info(f"Found {execution_result['row_count']} results in {execution_result['execution_time']:.2f} seconds")
-                        with col2:
-                            st.info(f"Time to find answer: {st.session_state.query_results['query_generation_time']:.2f} seconds")
-                        with col3:
-                            st.info(f"Attempts taken: {attempts}")
+                            with st.expander("View the technical details"):
+                                st.subheader("SQL Queries for Each Attempt:")
+                                for attempt_num, attempted_query in st.session_state.query_results['queries_attempted']:
+                                    st.text(f"Attempt {attempt_num}:")
+                                    st.code(attempted_query, language="sql")
+
+                            col_result, col_thumbs_up, col_thumbs_down = st.columns([9, 0.5, 0.5])
+
+                            with col_result:
+                                st.subheader("Results:")
+
+                            if 'feedback' not in st.session_state.query_results:
+                                with col_thumbs_up:
+                                    if st.button("👍", key=f"thumbs_up_{log_id}", disabled=('feedback' in st.session_state.query_results)):
+                                        post_feedback("positive", log_id)
+                                        st.session_state.query_results['feedback'] = "positive"
+                                        st.rerun()
+
+                                with col_thumbs_down:
+                                    if st.button("👎", key=f"thumbs_down_{log_id}", disabled=('feedback' in st.session_state.query_results)):
+                                        post_feedback("negative", log_id)
+                                        st.session_state.query_results['feedback'] = "negative"
+                                        st.rerun()
+
+                            df = build_dataframe(execution_result)
+                            with metrics.span('render'):
+                                st.dataframe(df, use_container_width=True, hide_index=True)
+
+                            col1, col2, col3 = st.columns([1, 1, 1])
+                            with col1:
+                                if execution_result.get('cached') and execution_result['cached_age'] > stale_after:
+                                    st.warning(f"Found {execution_result['row_count']} results, computed {describe_age(execution_result['cached_age'])} ago. Recent changes may not be included.")
+                                elif execution_result.get('cached'):
+                                    st.info(f"Found {execution_result['row_count']} results (cached, {describe_age(execution_result['cached_age'])} old)")
+                                else:
+                                    st.info(f"Found {execution_result['row_count']} results in {execution_result['execution_time']:.2f} seconds")
+                            with col2:
+                                st.info(f"Time to find answer: {st.session_state.query_results['query_generation_time']:.2f} seconds")
+                            with col3:
+                                st.info(f"Attempts taken: {attempts}")
                         
-                        if 'LIMIT' in query.upper():
-                            st.info(f"ℹ️ Note: We've limited the results to {len(df)} item{'s' if len(df) != 1 else ''}. There may be more data available.")
-
-                    # If the query was unsuccessful, display an error message
-                    elif st.session_state.query_results and st.session_state.query_results['success'] is False:
-                        st.error("We're sorry, but we couldn't find an answer to your question. Could you try rephrasing it?")
-                        st.info(f"Attempts taken: {attempts}")
-                        if query:
-                            with st.expander("Technical details"):
-                                st.code(query, language="sql")
-
-                except Exception as e:
-                    if str(e) == "I don't know":
-                        st.info(
-                            "I'm sorry, but I couldn't generate a valid query for your question. This might be because:\n\n"
-                            "- The question isn't related to the available database,\n"
-                            "- Some important information is missing,\n"
-                            "- Or it's a type of request the system isn't able to handle.\n\n"
-                            "Feel free to try rephrasing your question or providing more details!"
-                        )
-
-                    else:
-                        st.error("We're sorry, but something went wrong. Please try again later.")
-                        with open('error_log.csv', 'a') as f:
-                            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')},{user_question},{e}\n")
+                            if execution_result.get('truncated'):
+                                st.info(f"ℹ️ Note: This result was too large, so only the first {len(df)} rows were loaded.")
+                            elif 'LIMIT' in query.upper():
+                                st.info(f"ℹ️ Note: We've limited the results to {len(df)} item{'s' if len(df) != 1 else ''}. There may be more data available.")
+
+                            show_export(query_executor, query, log_id)
+
+                        # If the query was unsuccessful, display an error message
+                        elif st.session_state.query_results and st.session_state.query_results['success'] is False:
+                            query = st.session_state.query_results['query']
+                            attempts = len(st.session_state.query_results['queries_attempted'])
+                            if st.session_state.query_results.get('error_type') == 'cancelled':
+                                st.info("The query was stopped.")
+                            elif st.session_state.query_results.get('error_type') == 'busy':
+                                st.warning("The system is busy right now. Please try again in a moment.")
+                            elif st.session_state.query_results.get('error_type') == 'timeout':
+                                st.error("We're sorry, but your question took too long to answer. Could you try narrowing it down, e.g. to a shorter time period?")
+                            else:
+                                st.error("We're sorry, but we couldn't find an answer to your question. Could you try rephrasing it?")
+                            st.info(f"Attempts taken: {attempts}")
+                            if query:
+                                with st.expander("Technical details"):
+                                    st.code(query, language="sql")
+
+                    except Exception as e:
+                        if str(e) == "I don't know":
+                            st.info(
+                                "I'm sorry, but I couldn't generate a valid query for your question. This might be because:\n\n"
+                                "- The question isn't related to the available database,\n"
+                                "- Some important information is missing,\n"
+                                "- Or it's a type of request the system isn't able to handle.\n\n"
+                                "Feel free to try rephrasing your question or providing more details!"
+                            )
+
+                        else:
+                            st.error("We're sorry, but something went wrong. Please try again later.")
+                            get_error_log().record(user_question, e, model=st.session_state.selected_model)
         
         # If the user hasn't asked a question yet, display a warning
         else:
@@ -468,26 +1001,7 @@ def main():
     
     col1, col2, col3 = st.columns([1, 20, 1])
     with col2:
-        st.markdown("""
-        <h3 class="tips">Tips for asking good questions</h3>
-        <ul>
-        <li>
-            <div class="alert-icon">
-                <img src="data:image/png;base64,{}" width="24">
-            </div>
-            Be specific about what information you need from the EPSON Loyalty + Rewards program</li>
-        <li>
-            <div class="alert-icon">
-                <img src="data:image/png;base64,{}" width="24">
-            </div>
-            Include time periods or other details in your question when relevant</li>
-        </ul>
-        
-        <p class="example" style="margin-left: 15px"><em>Example: "How many companies were registered last year?"</em></p>
-        """.format(
-            get_image_base64(str(assets_path / "alert-circle.png")),
-            get_image_base64(str(assets_path / "alert-circle.png"))
-        ), unsafe_allow_html=True)
+        st.markdown(tips_html(), unsafe_allow_html=True)
 
 st.markdown(f"""
     <div class="fade"></div>
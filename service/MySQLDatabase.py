@@ -1,13 +1,29 @@
 import pymysql
+from pymysql.constants import FLAG
 from sshtunnel import SSHTunnelForwarder
 import paramiko
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import time
 import logging
-import socket
+import random
+import threading
+import weakref
 
 from service.config_adapter import ConfigAdapter
+from service.connection_pool import ConnectionPool
+from service.health import CircuitBreaker, backoff_delay
+from service.result_cache import ResultCache, estimate_row_size, normalize_sql
+from service.columnar import build_frame
+from service.cost_gate import CostGate
+from service.schema_catalog import SYSTEM_SCHEMAS, SchemaCatalog
+from service.projection import prune_hidden_columns
+from service.gateway import GatewayClient
+from service.single_flight import SingleFlight
+from service.metrics import metrics
+from service.query_guard import (QueryRegistry, RunningQuery, add_max_execution_time, has_max_execution_time,
+                                 ER_QUERY_INTERRUPTED, ER_QUERY_TIMEOUT)
+
 
 class SingletonMeta(type):
     _instances = {}
@@ -17,105 +33,850 @@ class SingletonMeta(type):
             cls._instances[cls] = super(SingletonMeta, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
 
-class DBConnectionManager(metaclass=SingletonMeta):
-    def __init__(self, logger: logging.Logger):
-        self.logger = logger
-        self._config_adapter = ConfigAdapter()
 
-        self.SSH_HOST = self._config_adapter.get_config('SSH_HOST')
-        self.SSH_PORT = int(self._config_adapter.get_config('SSH_PORT'))
-        self.SSH_USERNAME = self._config_adapter.get_config('SSH_USERNAME')
-        self.SSH_KEY_PATHS = self._config_adapter.get_config('SSH_KEY_PATHS').split(',')
+class MySQLBackend:
+    """One MySQL server behind its own SSH tunnel, with a connection pool, circuit breaker and heartbeat."""
 
-        self.MYSQL_HOST = self._config_adapter.get_config('MYSQL_HOST')
-        self.MYSQL_PORT = int(self._config_adapter.get_config('MYSQL_PORT'))
-        self.MYSQL_USER = self._config_adapter.get_config('MYSQL_USER')
-        self.MYSQL_PASSWORD = self._config_adapter.get_config('MYSQL_PASSWORD')
+    def __init__(self, manager: 'DBConnectionManager', name: str, mysql_host: str, mysql_port: int,
+                 weight: float = 1, role: str = 'primary'):
+        self.manager = manager
+        self.logger = manager.logger
+        self.name = name
+        self.MYSQL_HOST = mysql_host
+        self.MYSQL_PORT = mysql_port
+        self.weight = weight
+        self.role = role
+
+        self.tunnel = None
+        self.outstanding = 0  # Checked-out connections; maintained by the manager's router
+        self.lag = None
+        self.lagging = False
+        self._suspect = False  # Set on a connection failure until the heartbeat sees the backend healthy
+        self._check_lag_enabled = role == 'replica'
+
+        self._reconnect_lock = threading.Lock()
+        self._tunnel_key = None  # SSH key that last opened the tunnel; tried first on rebuilds
+        self._tunnel_established_at = None
+        self._tunnel_establish_seconds = None
+        self._tunnel_reconnects = 0
+        self._mysql_reconnects = 0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self.breaker = CircuitBreaker(
+            failure_threshold=manager.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=manager.CIRCUIT_RESET_TIMEOUT,
+        )
+        self.pool = ConnectionPool(
+            self._create_connection,
+            logger=self.logger,
+            max_size=manager.POOL_MAX_SIZE,
+            wait_timeout=manager.POOL_WAIT_TIMEOUT,
+            idle_timeout=manager.POOL_IDLE_TIMEOUT,
+            validator=lambda connection: connection.ping(reconnect=False),
+            validate_after=manager.VALIDATE_IDLE_AFTER,
+        )
+        if role == 'primary':
+            self._initialize_connection()
+        else:
+            # A replica that is down at startup must not stop the app; the heartbeat brings it in later
+            try:
+                self._initialize_connection()
+            except Exception as e:
+                self.logger.error(f"Replica {name} unavailable at startup: {e}")
+                self._suspect = True
+                self._wake_event.set()
 
-        self._initialize_connection()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name=f"mysql-heartbeat-{name}", daemon=True)
+        self._heartbeat_thread.start()
+
+    @property
+    def available(self) -> bool:
+        """Whether the router may send new queries here."""
+        return (
+            self.tunnel is not None
+            and not self._suspect
+            and not self.lagging
+            and self.breaker.state == CircuitBreaker.CLOSED
+        )
 
     def _initialize_connection(self):
-        self.tunnel = None
-        self.connection = None
-        for key_path in self.SSH_KEY_PATHS:
+        self._start_tunnel()
+        # Open the first connection eagerly so bad credentials fail at startup
+        try:
+            self.pool.release(self.pool.acquire())
+        except Exception:
+            # The next attempt opens its own tunnel; don't leave this one's forwarding threads running
+            self.tunnel.stop()
+            self.tunnel = None
+            raise
+
+    def _start_tunnel(self):
+        tunnel_start = time.perf_counter()
+        self.tunnel = self._open_tunnel()
+        elapsed = time.perf_counter() - tunnel_start
+        metrics.observe('ssh_tunnel', elapsed, 'ok' if self.tunnel else 'error', backend=self.name)
+        if not self.tunnel:
+            self.logger.error("All SSH authentication attempts failed.")
+            raise Exception("SSH authentication failed")
+        self._tunnel_established_at = time.time()
+        self._tunnel_establish_seconds = elapsed
+
+    def _open_tunnel(self) -> Optional[SSHTunnelForwarder]:
+        """Start a tunnel with the first SSH key that works; connections go to its local port."""
+        manager = self.manager
+        key_paths = sorted(manager.SSH_KEY_PATHS, key=lambda key_path: key_path != self._tunnel_key)
+        for key_path in key_paths:
             if not os.path.isfile(key_path):
                 self.logger.warning(f"Key file not found: {key_path}")
                 continue
 
             try:
-                self.tunnel = SSHTunnelForwarder(
-                    (self.SSH_HOST, self.SSH_PORT),
-                    ssh_username=self.SSH_USERNAME,
+                tunnel = SSHTunnelForwarder(
+                    (manager.SSH_HOST, manager.SSH_PORT),
+                    ssh_username=manager.SSH_USERNAME,
                     ssh_pkey=key_path,
                     remote_bind_address=(self.MYSQL_HOST, self.MYSQL_PORT),
+                    set_keepalive=manager.SSH_KEEPALIVE_INTERVAL,
                     logger=self.logger
                 )
-                self.tunnel.start()
-                self.logger.info(f"SSH tunnel established using key: {key_path}")
-                break
+                tunnel.start()
+                self.logger.info(f"SSH tunnel to {self.name} established using key: {key_path}")
+                self._tunnel_key = key_path
+                return tunnel
             except paramiko.PasswordRequiredException:
                 self.logger.error(f"Password required for key: {key_path}. Skipping this key.")
             except Exception as e:
                 self.logger.error(f"Attempt with key {key_path} failed: {e}")
+        return None
 
-        if not self.tunnel:
-            self.logger.error("All SSH authentication attempts failed.")
-            raise Exception("SSH authentication failed")
+    def _create_connection(self) -> pymysql.connections.Connection:
+        try:
+            if not self.tunnel or not self.tunnel.is_active:
+                raise pymysql.OperationalError(2003, "SSH tunnel is not active")
+            connection = pymysql.connect(
+                host='127.0.0.1',
+                port=self.tunnel.local_bind_port,
+                user=self.manager.MYSQL_USER,
+                password=self.manager.MYSQL_PASSWORD,
+                cursorclass=pymysql.cursors.DictCursor,
+                read_timeout=self.manager.READ_TIMEOUT,
+            )
+        except (pymysql.MySQLError, OSError):
+            self.breaker.record_failure()
+            self._wake_event.set()
+            raise
+        self.breaker.record_success()
+        self.logger.info(f"MySQL database connection to {self.name} established.")
+        return connection
 
-        self.connection = pymysql.connect(
-            host='127.0.0.1',
-            port=self.tunnel.local_bind_port,
-            user=self.MYSQL_USER,
-            password=self.MYSQL_PASSWORD,
-            cursorclass=pymysql.cursors.DictCursor 
-        )
-        self.logger.info("MySQL database connection established.")
+    def kill_query(self, thread_id: int):
+        """Stop the statement running on `thread_id` from a side connection outside the pool."""
+        connection = self._create_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("KILL QUERY %s", (thread_id,))
+        finally:
+            connection.close()
+
+    def report_connection_failure(self, connection: pymysql.connections.Connection):
+        """Drop a connection that broke mid-query, take the backend out of rotation and let the heartbeat recover."""
+        self.pool.release(connection, discard=True)
+        self.breaker.record_failure()
+        self._suspect = True
+        self._wake_event.set()
 
-    def get_connection(self) -> pymysql.connections.Connection:
-        return self.connection
+    def _heartbeat_loop(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.manager.HEARTBEAT_INTERVAL)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                if self._is_healthy():
+                    self._suspect = False
+                    if self._check_lag_enabled:
+                        self._check_lag()
+                    continue
+            except Exception as e:
+                self.logger.warning(f"Database heartbeat for {self.name} failed: {e}")
+            self._reconnect_with_backoff()
+
+    def _is_tunnel_healthy(self) -> bool:
+        """SSH transport is up; SSH keepalives (SSH_KEEPALIVE_INTERVAL) take it down when the bastion stops answering.
+
+        Whether the forward reaches MySQL is left to the pool's pings: probing it with a bare
+        TCP connect counts as a connect error on MySQL and can get the bastion host blocked.
+        """
+        return bool(self.tunnel) and self.tunnel.is_active
+
+    def _is_healthy(self) -> bool:
+        if not self._is_tunnel_healthy():
+            return False
+        if self.pool.validate_idle() == 0 and self.breaker.state == CircuitBreaker.CLOSED and not self._suspect:
+            return True
+        # Probe with a fresh connection; success closes the circuit
+        self._create_connection().close()
+        return True
+
+    def _check_lag(self):
+        """Eject a replica whose replication is stopped or further behind than MYSQL_REPLICA_MAX_LAG."""
+        connection = self.pool.acquire()
+        try:
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except pymysql.ProgrammingError:
+                    # Servers before 8.0.22 only know the old spelling
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone()
+        except pymysql.MySQLError as e:
+            if _is_connection_error(e):
+                self.pool.release(connection, discard=True)
+                raise
+            self.logger.warning(f"Cannot read replication status of {self.name}, lag checks disabled: {e}")
+            self._check_lag_enabled = False
+            self.pool.release(connection)
+            return
+        self.pool.release(connection)
+
+        if not status:
+            self.lag, lagging = None, False
+        else:
+            self.lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+            lagging = self.lag is None or self.lag > self.manager.REPLICA_MAX_LAG
+        if lagging != self.lagging:
+            self.logger.warning(f"Replica {self.name} {'ejected' if lagging else 'back in rotation'} (lag: {self.lag})")
+        self.lagging = lagging
+
+    def _reconnect_with_backoff(self):
+        attempt = 0
+        while not self._stop_event.is_set():
+            try:
+                self.reconnect(self.pool.generation)
+                self.breaker.record_success()
+                self._suspect = False
+                self.logger.info(f"Database connection to {self.name} restored.")
+                return
+            except Exception as e:
+                self.breaker.record_failure()
+                delay = backoff_delay(attempt, self.manager.RECONNECT_BACKOFF_BASE, self.manager.RECONNECT_BACKOFF_MAX)
+                self.logger.warning(f"Reconnect attempt {attempt + 1} to {self.name} failed: {e}. Retrying in {delay:.1f}s")
+                attempt += 1
+                if self._stop_event.wait(delay):
+                    return
+
+    def reconnect(self, generation: int):
+        """Rebuild the failed layer unless another thread already did since `generation`.
+
+        A healthy tunnel is kept and only the MySQL connections are replaced; the
+        tunnel is restarted (and the pool with it) only when SSH itself is down.
+        """
+        with self._reconnect_lock:
+            if self.pool.generation != generation:
+                return
+            if self._is_tunnel_healthy():
+                self.pool.clear()
+                self._create_connection().close()
+                self._mysql_reconnects += 1
+                self.logger.info(f"MySQL connections to {self.name} rebuilt over the existing SSH tunnel.")
+                return
+            self.close()
+            self._initialize_connection()
+            self._tunnel_reconnects += 1
+
+    def health_stats(self) -> Dict[str, Any]:
+        return {
+            "tunnel_active": bool(self.tunnel and self.tunnel.is_active),
+            "tunnel_key": os.path.basename(self._tunnel_key) if self._tunnel_key else None,
+            "tunnel_established_at": self._tunnel_established_at,
+            "tunnel_establish_seconds": self._tunnel_establish_seconds,
+            "tunnel_reconnects": self._tunnel_reconnects,
+            "mysql_reconnects": self._mysql_reconnects,
+            "circuit": self.breaker.stats(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "role": self.role,
+            "weight": self.weight,
+            "available": self.available,
+            "outstanding": self.outstanding,
+            "lag": self.lag,
+            "pool": self.pool.stats(),
+            "health": self.health_stats(),
+        }
 
     def close(self):
-        if self.connection:
-            self.connection.close()
-            self.logger.info("MySQL database connection closed.")
+        self.pool.clear()
+        self.logger.info(f"MySQL database connections to {self.name} closed.")
         if self.tunnel:
             self.tunnel.stop()
-            self.logger.info("SSH tunnel closed.")
+            self.logger.info(f"SSH tunnel to {self.name} closed.")
+
+    def shutdown(self):
+        """Stop the heartbeat thread and close all connections."""
+        self._stop_event.set()
+        self._wake_event.set()
+        self._heartbeat_thread.join(timeout=5)
+        self.close()
+
+
+class DBConnectionManager(metaclass=SingletonMeta):
+    """Routes read-only queries across the primary and any replicas in MYSQL_REPLICAS.
+
+    Each backend has its own SSH tunnel and pool. New checkouts go to the available
+    read backend with the fewest outstanding queries per unit of weight; replicas
+    that fail or lag are ejected until their heartbeat sees them healthy again, and
+    the primary takes the load when no replica is available.
+    """
+
+    backend_class = MySQLBackend
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._config_adapter = ConfigAdapter()
+
+        self.SSH_HOST = self._config_adapter.get_config('SSH_HOST')
+        self.SSH_PORT = int(self._config_adapter.get_config('SSH_PORT'))
+        self.SSH_USERNAME = self._config_adapter.get_config('SSH_USERNAME')
+        self.SSH_KEY_PATHS = self._config_adapter.get_config('SSH_KEY_PATHS').split(',')
+        self.SSH_KEEPALIVE_INTERVAL = float(self._config_adapter.get_config('SSH_KEEPALIVE_INTERVAL', 15))
+
+        self.MYSQL_HOST = self._config_adapter.get_config('MYSQL_HOST')
+        self.MYSQL_PORT = int(self._config_adapter.get_config('MYSQL_PORT'))
+        self.MYSQL_USER = self._config_adapter.get_config('MYSQL_USER')
+        self.MYSQL_PASSWORD = self._config_adapter.get_config('MYSQL_PASSWORD')
+        # Comma-separated host:port[:weight] list of read replicas
+        self.MYSQL_REPLICAS = self._config_adapter.get_config('MYSQL_REPLICAS', '')
+        self.REPLICA_MAX_LAG = float(self._config_adapter.get_config('MYSQL_REPLICA_MAX_LAG', 30))
+        # Share of reads the primary takes while replicas are healthy; 0 keeps it as fallback only
+        self.PRIMARY_READ_WEIGHT = float(self._config_adapter.get_config('MYSQL_PRIMARY_READ_WEIGHT', 0))
+
+        self.POOL_MAX_SIZE = int(self._config_adapter.get_config('MYSQL_POOL_MAX_SIZE', 5))
+        self.POOL_WAIT_TIMEOUT = float(self._config_adapter.get_config('MYSQL_POOL_WAIT_TIMEOUT', 10))
+        self.POOL_IDLE_TIMEOUT = float(self._config_adapter.get_config('MYSQL_POOL_IDLE_TIMEOUT', 300))
+
+        self.VALIDATE_IDLE_AFTER = float(self._config_adapter.get_config('MYSQL_VALIDATE_IDLE_AFTER', 30))
+        self.HEARTBEAT_INTERVAL = float(self._config_adapter.get_config('MYSQL_HEARTBEAT_INTERVAL', 30))
+        self.RECONNECT_BACKOFF_BASE = float(self._config_adapter.get_config('MYSQL_RECONNECT_BACKOFF_BASE', 1))
+        self.RECONNECT_BACKOFF_MAX = float(self._config_adapter.get_config('MYSQL_RECONNECT_BACKOFF_MAX', 60))
+        self.CIRCUIT_FAILURE_THRESHOLD = int(self._config_adapter.get_config('MYSQL_CIRCUIT_FAILURE_THRESHOLD', 3))
+        self.CIRCUIT_RESET_TIMEOUT = float(self._config_adapter.get_config('MYSQL_CIRCUIT_RESET_TIMEOUT', 30))
+
+        self.QUERY_TIMEOUT = float(self._config_adapter.get_config('QUERY_TIMEOUT', 60))
+        # Client-side backstop in case the server-side limit and KILL QUERY both fail
+        self.READ_TIMEOUT = float(self._config_adapter.get_config('MYSQL_READ_TIMEOUT', self.QUERY_TIMEOUT + 15))
+        self.queries = QueryRegistry(self.kill_query, logger=self.logger,
+                                     kill_grace=float(self._config_adapter.get_config('QUERY_KILL_GRACE', 5)))
+
+        self._lock = threading.Lock()
+        self._owners: Dict[int, MySQLBackend] = {}  # id(connection) -> backend it was checked out from
+        self.primary = self.backend_class(self, 'primary', self.MYSQL_HOST, self.MYSQL_PORT)
+        self.replicas = [
+            self.backend_class(self, f'replica-{index}', host, port, weight, role='replica')
+            for index, (host, port, weight) in enumerate(_parse_backends(self.MYSQL_REPLICAS), start=1)
+        ]
+        self.primary.weight = self.PRIMARY_READ_WEIGHT if self.replicas else 1
+        self.backends = [self.primary] + self.replicas
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self.primary.pool
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.primary.breaker
+
+    @property
+    def tunnel(self):
+        return self.primary.tunnel
+
+    def _choose_backend(self) -> MySQLBackend:
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.weight > 0 and backend.available]
+            if not candidates:
+                return self.primary
+            return min(candidates, key=lambda backend: ((backend.outstanding + 1) / backend.weight, random.random()))
+
+    def acquire(self) -> pymysql.connections.Connection:
+        """Borrow a connection from the least loaded read backend, failing fast while its circuit is open."""
+        with metrics.span('connection_checkout'):
+            backend = self._choose_backend()
+            backend.breaker.check()
+            with self._lock:
+                backend.outstanding += 1
+            try:
+                connection = backend.pool.acquire()
+            except Exception:
+                with self._lock:
+                    backend.outstanding -= 1
+                raise
+            with self._lock:
+                self._owners[id(connection)] = backend
+            return connection
+
+    def _pop_owner(self, connection) -> MySQLBackend:
+        with self._lock:
+            backend = self._owners.pop(id(connection), None)
+            if backend is None:
+                return self.primary
+            backend.outstanding -= 1
+            return backend
+
+    def release(self, connection: pymysql.connections.Connection, discard: bool = False):
+        connection._read_timeout = self.READ_TIMEOUT  # undo start_query's statement budget
+        self._pop_owner(connection).pool.release(connection, discard=discard)
+
+    def report_connection_failure(self, connection: pymysql.connections.Connection):
+        """Drop a connection that broke mid-query; its backend leaves rotation until it recovers."""
+        self._pop_owner(connection).report_connection_failure(connection)
+
+    def start_query(self, connection: pymysql.connections.Connection, timeout: float,
+                    cancel_token: Optional[str] = None, server_limit: bool = False) -> RunningQuery:
+        """Register a statement on `connection`; a kill goes to the server that runs it.
+
+        The socket read timeout is widened to the statement's budget, so a long export
+        is not cut off as a lost connection; pymysql applies it on every read.
+        """
+        connection._read_timeout = max(self.READ_TIMEOUT, timeout + self.READ_TIMEOUT - self.QUERY_TIMEOUT)
+        with self._lock:
+            backend = self._owners.get(id(connection), self.primary)
+        return self.queries.start(connection.thread_id(), timeout, cancel_token, kill=backend.kill_query,
+                                  server_limit=server_limit)
+
+    def kill_query(self, thread_id: int):
+        self.primary.kill_query(thread_id)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self.primary.pool.stats()
+
+    def health_stats(self) -> Dict[str, Any]:
+        return {**self.primary.health_stats(), "backends": self.backend_stats()}
+
+    def backend_stats(self):
+        return [backend.stats() for backend in self.backends]
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+    def shutdown(self):
+        """Stop the heartbeat threads and close all connections."""
+        for backend in self.backends:
+            backend.shutdown()
+
+
+def _parse_backends(spec: str):
+    backends = []
+    for entry in filter(None, (item.strip() for item in spec.split(','))):
+        host, port, *weight = entry.split(':')
+        backends.append((host, int(port), float(weight[0]) if weight else 1.0))
+    return backends
+
+
+def _is_connection_error(error: pymysql.MySQLError) -> bool:
+    # Client-side error codes (2000-2999) mean the connection failed, not the SQL
+    if isinstance(error, pymysql.InterfaceError):
+        return True
+    code = error.args[0] if error.args else None
+    return isinstance(code, int) and 2000 <= code < 3000
+
+
+def _release_abandoned(db_manager: 'DBConnectionManager', lease: list, running: RunningQuery):
+    if lease:
+        running.finish()
+        db_manager.release(lease.pop(), discard=True)
+
+
+class RowStream:
+    """Rows of an unbuffered query, yielded in chunks until exhausted or a cap is hit.
+
+    A stream that is dropped without being read or closed returns its connection when
+    it is garbage collected.
+    """
+
+    def __init__(self, db_manager: DBConnectionManager, connection, cursor, running: RunningQuery,
+                 start_time: float, chunk_size: int, max_rows: Optional[int], max_bytes: Optional[int]):
+        self._db_manager = db_manager
+        self._lease = [connection]  # shared with the finalizer, so the connection is released once
+        self._cursor = cursor
+        self._running = running
+        self._start_time = start_time
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+        self.row_count = 0
+        self.byte_count = 0
+        self.truncated = False
+        self.error = None
+        self.error_type = None
+        self.execution_time = None
+        self._started = False
+        self._iterator = self._chunks()
+        weakref.finalize(self, _release_abandoned, db_manager, self._lease, running)
+
+    def __iter__(self):
+        return self._iterator
+
+    def _chunks(self):
+        self._started = True
+        finished = False
+        try:
+            while True:
+                rows = self._cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    finished = True
+                    break
+                rows = self._apply_caps(rows)
+                self.row_count += len(rows)
+                if rows:
+                    yield rows
+                if self.truncated:
+                    break
+        except pymysql.MySQLError as e:
+            self.error = str(e)
+            self.error_type = _classify_error(e, self._running)
+        finally:
+            self.execution_time = round(time.time() - self._start_time, 4)
+            metrics.observe('fetch', time.time() - self._start_time, 'ok' if self.error is None else 'error',
+                            rows=self.row_count, truncated=self.truncated)
+            self._finish(finished)
+
+    def _apply_caps(self, rows):
+        if self.max_rows is not None and self.row_count + len(rows) > self.max_rows:
+            rows = rows[:self.max_rows - self.row_count]
+            self.truncated = True
+        if self.max_bytes is not None:
+            for i, row in enumerate(rows):
+                self.byte_count += estimate_row_size(row)
+                if self.byte_count > self.max_bytes:
+                    rows = rows[:i]
+                    self.truncated = True
+                    break
+        return rows
+
+    def _finish(self, finished: bool):
+        if not self._lease:
+            return
+        connection = self._lease.pop()
+        self._running.finish()
+        if finished:
+            self._cursor.close()
+            self._db_manager.release(connection, discard=_was_stopped(self._running, self.error_type))
+        else:
+            # Closing an unbuffered cursor drains the rest of the result over the
+            # tunnel, so drop the whole connection instead
+            self._db_manager.release(connection, discard=True)
+
+    def close(self):
+        """Stop the transfer early and return the connection."""
+        if self._started:
+            self._iterator.close()
+        else:
+            self._finish(False)
+
+
+def _was_stopped(running: RunningQuery, error_type: Optional[str]) -> bool:
+    """Whether a KILL QUERY may still reach the connection, so it must not run another statement."""
+    return running.reason is not None or error_type in ('timeout', 'cancelled')
+
+
+def _classify_error(error: pymysql.MySQLError, running: RunningQuery) -> str:
+    """'timeout' and 'cancelled' for statements we stopped, else 'connection' or 'sql'."""
+    if running.reason is not None:
+        return running.reason
+    code = error.args[0] if error.args else None
+    if code == ER_QUERY_TIMEOUT:
+        return 'timeout'
+    if code == ER_QUERY_INTERRUPTED:
+        return 'cancelled'  # a KILL QUERY we did not send, e.g. from a DBA
+    if _is_connection_error(error):
+        # A read timeout surfaces as a lost connection once the budget is spent
+        return 'timeout' if running.elapsed >= running.timeout else 'connection'
+    return 'sql'
+
 
 class ExecuteQuery:
-    def __init__(self, db_manager: DBConnectionManager, logger: logging.Logger):
+    def __init__(self, db_manager: Optional[DBConnectionManager], logger: logging.Logger,
+                 result_cache: Optional[ResultCache] = None, cost_gate: Optional[CostGate] = None,
+                 catalog: Optional[SchemaCatalog] = None, gateway: Optional[GatewayClient] = None):
         self.db_manager = db_manager
         self.logger = logger
+        self.result_cache = result_cache
+        self.cost_gate = cost_gate
+        self.catalog = catalog
+        self.gateway = gateway
+        self.in_flight = SingleFlight('sql')
 
-    def _ensure_connection(self):
-        """Check if the database connection is alive. If not, reconnect."""
-        try:
-            with self.db_manager.get_connection().cursor() as cursor:
-                cursor.execute("SELECT 1")  # Simple query to check connection
-        except (pymysql.MySQLError, pymysql.OperationalError) as e:
-            # self.logger.warning(f"Database connection lost: {e}. Attempting to reconnect...")
-            self.db_manager.close()  # Close current connection
-            self.db_manager._initialize_connection()  # Re-establish connection
+        config = db_manager._config_adapter if db_manager is not None else ConfigAdapter()
+        self.STREAM_CHUNK_SIZE = int(config.get_config('STREAM_CHUNK_SIZE', 1000))
+        self.STREAM_MAX_ROWS = int(config.get_config('STREAM_MAX_ROWS', 100000))
+        self.STREAM_MAX_BYTES = int(config.get_config('STREAM_MAX_BYTES', 256 * 1024 * 1024))
+        self.PRUNE_HIDDEN_COLUMNS = config.get_config('PRUNE_HIDDEN_COLUMNS', 'true').lower() == 'true'
 
-    def execute(self, query: str) -> Dict[str, Any]:
-        """Execute a query after ensuring the connection is active."""
-        self._ensure_connection()  # Check and reconnect if needed
+    @classmethod
+    def client(cls, socket_path: str, logger: logging.Logger) -> 'ExecuteQuery':
+        """Client mode: every call is served by the query gateway on `socket_path` (see service.gateway),
+        which owns the tunnel, the connection pool, the caches and the preflight checks."""
+        return cls(None, logger, gateway=GatewayClient(socket_path))
 
-        try:
-            start_time = time.time()
-            with self.db_manager.get_connection().cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                row_count = len(rows)
-            end_time = time.time()
-            execution_time = end_time - start_time
+    def cancel(self, cancel_token: str) -> bool:
+        """Cancel the query started with `cancel_token`, e.g. from a Stop button."""
+        if self.gateway is not None:
+            return self.gateway.call('cancel', cancel_token)
+        return self.db_manager.queries.cancel(cancel_token)
+
+    def is_cancelled(self, cancel_token: Optional[str]) -> bool:
+        if self.gateway is not None:
+            return cancel_token is not None and self.gateway.call('is_cancelled', cancel_token)
+        return self.db_manager.queries.is_cancelled(cancel_token)
+
+    def _coalesce(self, key, cancel_token: Optional[str], run) -> Dict[str, Any]:
+        """Run `run()` once for concurrent callers with the same statement; the others share its result."""
+        result, shared = self.in_flight.do(key, run)
+        if shared and result.get('error_type') == 'cancelled' and not self.is_cancelled(cancel_token):
+            # The caller that ran it was stopped; this one was not
+            return self._coalesce(key, cancel_token, run)
+        # The caller that ran it gets a copy too, as callers add keys such as executed_query
+        return dict(result)
+
+    def _run(self, query: str, fetch, cancel_token: Optional[str], timeout: Optional[float]) -> Dict[str, Any]:
+        """Run `fetch(connection, query)` under the time budget, retrying once on a dropped connection."""
+        timeout = timeout or self.db_manager.QUERY_TIMEOUT
+        query = add_max_execution_time(query, timeout)
+
+        for attempt in range(2):
+            # Also before the retry: the user may have pressed Stop while the connection failed
+            if self.db_manager.queries.is_cancelled(cancel_token):
+                return {"error": "Query was cancelled", "error_type": "cancelled"}
+            connection = self.db_manager.acquire()
+            running = self.db_manager.start_query(connection, timeout, cancel_token,
+                                                  server_limit=has_max_execution_time(query))
+            error_type = None
+            try:
+                start_time = time.time()
+                result = fetch(connection, query)
+                result["execution_time"] = round(time.time() - start_time, 4)
+                return result
+            except pymysql.MySQLError as e:
+                error_type = _classify_error(e, running)
+                if _is_connection_error(e):
+                    if error_type == 'connection':
+                        self.db_manager.report_connection_failure(connection)
+                    else:
+                        self.db_manager.release(connection, discard=True)
+                    connection = None
+                    if error_type == 'connection' and attempt == 0:
+                        continue  # Generated queries are read-only, so one retry is safe
+                return {"error": str(e), "error_type": error_type}
+            finally:
+                running.finish()
+                if connection is not None:
+                    self.db_manager.release(connection, discard=_was_stopped(running, error_type))
+
+    def explain(self, query: str) -> Dict[str, Any]:
+        def fetch(connection, sql):
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                return {"rows": cursor.fetchall()}
+
+        with metrics.span('preflight'):
+            return self._run(f"EXPLAIN {query}", fetch, None, None)
+
+    def load_catalog(self) -> Dict[str, Any]:
+        """Read tables, columns, types and indexes of the user schemas for SchemaCatalog."""
+        if self.gateway is not None:
+            return self.gateway.call('load_catalog')
+        excluded = ', '.join(f"'{schema}'" for schema in SYSTEM_SCHEMAS)
+        queries = {
+            "columns": (
+                "SELECT TABLE_SCHEMA AS table_schema, TABLE_NAME AS table_name, COLUMN_NAME AS column_name, "
+                "DATA_TYPE AS data_type FROM information_schema.COLUMNS "
+                f"WHERE TABLE_SCHEMA NOT IN ({excluded}) ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION"
+            ),
+            "indexes": (
+                "SELECT TABLE_SCHEMA AS table_schema, TABLE_NAME AS table_name, INDEX_NAME AS index_name, "
+                "COLUMN_NAME AS column_name, SEQ_IN_INDEX AS seq_in_index FROM information_schema.STATISTICS "
+                f"WHERE TABLE_SCHEMA NOT IN ({excluded})"
+            ),
+        }
+
+        def fetch(connection, sql):
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                return {"rows": cursor.fetchall()}
+
+        catalog = {}
+        for name, sql in queries.items():
+            result = self._run(sql, fetch, None, None)
+            if 'error' in result:
+                raise Exception(f"Loading {name} from information_schema failed: {result['error']}")
+            catalog[name] = result['rows']
+        return catalog
+
+    def preflight(self, query: str) -> Dict[str, Any]:
+        """Check a generated query against the schema catalog, then its EXPLAIN plan; see CostGate.check.
 
+        Allowed queries also have hidden columns pruned from their select list; the query
+        before pruning is returned as "unpruned" so callers can fall back to it.
+        """
+        if self.gateway is not None:
+            return self.gateway.call('preflight', query)
+        if self.catalog is not None:
+            with metrics.span('schema_check') as span:
+                problems = self.catalog.check(query)
+                if problems:
+                    span['outcome'] = 'rejected'
+                    self.logger.info(f"Schema check rejected query: {'; '.join(problems)}")
+                    return {"action": "reject", "query": query, "reason": "; ".join(problems), "error_type": "sql"}
+        if self.cost_gate is None:
+            preflight = {"action": "allow", "query": query, "reason": None, "error_type": None}
+        else:
+            preflight = self.cost_gate.check(query, self.explain)
+        if preflight['action'] != 'reject':
+            pruned = self.prune_hidden_columns(preflight['query'])
+            if pruned is not None:
+                preflight = dict(preflight, query=pruned, unpruned=preflight['query'])
+        return preflight
+
+    def prune_hidden_columns(self, query: str) -> Optional[str]:
+        """`query` without hidden `_id`/`_pk` output columns, or None if it cannot be rewritten safely."""
+        if self.catalog is None or not self.catalog.loaded or not self.PRUNE_HIDDEN_COLUMNS:
+            return None
+        with metrics.span('projection') as span:
+            pruned = prune_hidden_columns(query, self.catalog.column_names)
+            span['outcome'] = 'rewritten' if pruned is not None else 'unchanged'
+        return pruned
+
+    def execute(self, query: str, cancel_token: Optional[str] = None, timeout: Optional[float] = None,
+                cache_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Execute a query on a pooled connection. Idle connections are validated by the pool.
+
+        With `cache_ttl`, any cached result is ignored and the fresh one is kept for that long.
+        """
+        if self.gateway is not None:
+            return self.gateway.call('execute', query, cancel_token=cancel_token, timeout=timeout, cache_ttl=cache_ttl)
+        if self.result_cache is not None and cache_ttl is None:
+            cached = self.result_cache.get(query)
+            if cached is not None:
+                return cached
+
+        def fetch(connection, sql):
+            with connection.cursor() as cursor:
+                with metrics.span('sql_execution'):
+                    cursor.execute(sql)
+                with metrics.span('fetch'):
+                    rows = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
             return {
                 "columns": columns,
                 "rows": rows,
-                "execution_time": round(execution_time, 4),
-                "row_count": row_count
+                "row_count": len(rows)
             }
+
+        def run():
+            result = self._run(query, fetch, cancel_token, timeout)
+            if self.result_cache is not None and 'error' not in result:
+                self.result_cache.put(query, result, ttl=cache_ttl)
+            return result
+
+        return self._coalesce(('execute', normalize_sql(query), cache_ttl), cancel_token, run)
+
+    def execute_stream(self, query: str, chunk_size: Optional[int] = None,
+                       max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                       cancel_token: Optional[str] = None, timeout: Optional[float] = None,
+                       as_tuples: bool = False) -> Dict[str, Any]:
+        """Execute a query on a server-side cursor and return its rows as a chunked stream.
+
+        A cap of 0 disables it. With `as_tuples` rows are plain tuples, the result cache is
+        skipped and the cursor description and unsigned flags are included, which is what
+        exports need.
+        """
+        if self.gateway is not None:
+            return self.gateway.call('execute_stream', query, chunk_size=chunk_size, max_rows=max_rows, max_bytes=max_bytes,
+                                     cancel_token=cancel_token, timeout=timeout, as_tuples=as_tuples)
+        if self.result_cache is not None and not as_tuples:
+            cached = self.result_cache.get(query)
+            if cached is not None:
+                return cached
+        if self.db_manager.queries.is_cancelled(cancel_token):
+            return {"error": "Query was cancelled", "error_type": "cancelled"}
+        timeout = timeout or self.db_manager.QUERY_TIMEOUT
+
+        query = add_max_execution_time(query, timeout)
+        connection = self.db_manager.acquire()
+        running = self.db_manager.start_query(connection, timeout, cancel_token,
+                                              server_limit=has_max_execution_time(query))
+        start_time = time.time()
+        try:
+            cursor = connection.cursor(pymysql.cursors.SSCursor if as_tuples else pymysql.cursors.SSDictCursor)
+            with metrics.span('sql_execution'):
+                cursor.execute(query)
         except pymysql.MySQLError as e:
-            return {"error": str(e)}
\ No newline at end of file
+            error_type = _classify_error(e, running)
+            running.finish()
+            if error_type == 'connection':
+                self.db_manager.report_connection_failure(connection)
+            else:
+                self.db_manager.release(connection, discard=_is_connection_error(e) or _was_stopped(running, error_type))
+            return {"error": str(e), "error_type": error_type}
+
+        max_rows = max_rows if max_rows is not None else self.STREAM_MAX_ROWS
+        max_bytes = max_bytes if max_bytes is not None else self.STREAM_MAX_BYTES
+        result = {
+            "columns": [desc[0] for desc in cursor.description],
+            "stream": RowStream(
+                self.db_manager, connection, cursor, running, start_time,
+                chunk_size=chunk_size or self.STREAM_CHUNK_SIZE,
+                max_rows=max_rows or None,
+                max_bytes=max_bytes or None,
+            ),
+            "streaming": True,
+        }
+        if as_tuples:
+            result["description"] = cursor.description
+            # Not part of the DB-API description; exports need it to type BIGINT UNSIGNED
+            result["unsigned"] = [bool(field.flags & FLAG.UNSIGNED) for field in cursor._result.fields]
+        return result
+
+    def execute_columnar(self, query: str, cancel_token: Optional[str] = None, timeout: Optional[float] = None,
+                         cache_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Execute a query and build a typed DataFrame from tuple rows, without per-row dicts."""
+        if self.gateway is not None:
+            return self.gateway.call('execute_columnar', query, cancel_token=cancel_token, timeout=timeout,
+                                     cache_ttl=cache_ttl)
+        if self.result_cache is not None and cache_ttl is None:
+            cached = self.result_cache.get(query)
+            if cached is not None:
+                return cached
+
+        def fetch(connection, sql):
+            with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                with metrics.span('sql_execution'):
+                    cursor.execute(sql)
+                description = cursor.description
+                column_values = [[] for _ in description]
+                with metrics.span('fetch'):
+                    while True:
+                        rows = cursor.fetchmany(self.STREAM_CHUNK_SIZE)
+                        if not rows:
+                            break
+                        for values, column in zip(column_values, zip(*rows)):
+                            values.extend(column)
+            with metrics.span('dataframe_build'):
+                frame = build_frame(description, column_values)
+            return {
+                "columns": list(frame.columns),
+                "frame": frame,
+                "row_count": len(frame)
+            }
+
+        def run():
+            result = self._run(query, fetch, cancel_token, timeout)
+            if self.result_cache is not None and 'error' not in result:
+                self.result_cache.put(query, result, ttl=cache_ttl)
+            return result
+
+        return self._coalesce(('execute_columnar', normalize_sql(query), cache_ttl), cancel_token, run)
@@ -0,0 +1,74 @@
+import base64
+import io
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+class AssetStore:
+    """Loads and base64-encodes static assets once per process, reloading a file when its mtime changes."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Optional[int]], Tuple[int, str]] = {}  # (name, width) -> (mtime_ns, base64)
+        self._fragments: Dict[str, Tuple[Tuple[int, ...], str]] = {}  # key -> (version, html)
+        for path in sorted(self.directory.iterdir()):
+            if path.is_file():
+                self.base64(path.name)
+
+    def base64(self, name: str, width: Optional[int] = None) -> str:
+        """Base64 of an asset, optionally downscaled to `width` pixels for inline use."""
+        path = self.directory / name
+        mtime = path.stat().st_mtime_ns
+        entry = self._entries.get((name, width))
+        if entry is None or entry[0] != mtime:
+            with self._lock:
+                data = path.read_bytes()
+                if width is not None:
+                    data = _downscale(data, width)
+                entry = (mtime, base64.b64encode(data).decode())
+                self._entries[(name, width)] = entry
+        return entry[1]
+
+    def version(self, names: Iterable[str]) -> Tuple[int, ...]:
+        """mtimes of `names`; use as a cache key for fragments built from them."""
+        return tuple((self.directory / name).stat().st_mtime_ns for name in names)
+
+    def fragment(self, key: str, names: Iterable[str], build: Callable[[], str]) -> str:
+        """Return the fragment built from `names`, rebuilding it only when one of them changed."""
+        names = tuple(names)
+        version = self.version(names)
+        cached = self._fragments.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, build())
+            self._fragments[key] = cached
+        return cached[1]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self._entries),
+            "encoded_bytes": sum(len(encoded) for _, encoded in self._entries.values()),
+        }
+
+
+def _downscale(data: bytes, width: int) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    image = Image.open(io.BytesIO(data))
+    if image.width <= width:
+        return data
+    height = round(image.height * width / image.width)
+    output = io.BytesIO()
+    image.resize((width, height), Image.LANCZOS).save(output, format=image.format or 'PNG', optimize=True)
+    return output.getvalue()
+
+
+def minify_css(css: str) -> str:
+    """Collapse whitespace in a CSS block without touching selector semantics."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
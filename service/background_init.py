@@ -0,0 +1,55 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Optional
+
+
+class BackgroundInit:
+    """Builds an expensive object on a background thread so callers can render without it.
+
+    A failed attempt is retried on the first `retry_if_failed` call at least
+    `retry_interval` seconds after it failed.
+    """
+
+    def __init__(self, factory: Callable[[], Any], logger: logging.Logger, name: str = "background-init",
+                 retry_interval: float = 10):
+        self._factory = factory
+        self.logger = logger
+        self.name = name
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.started_at = None
+        self.seconds = None
+        self._failed_at = None
+        self._start()
+
+    def _start(self):
+        self._done.clear()
+        self.error = None
+        self.started_at = time.monotonic()
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def _run(self):
+        try:
+            self.result = self._factory()
+            self.seconds = time.monotonic() - self.started_at
+            self.logger.info(f"{self.name} ready in {self.seconds:.2f}s")
+        except Exception as e:
+            self.error = e
+            self._failed_at = time.monotonic()
+            self.logger.error(f"{self.name} failed: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.result is not None
+
+    def retry_if_failed(self):
+        with self._lock:
+            if (self.error is not None and self._done.is_set()
+                    and time.monotonic() - self._failed_at >= self.retry_interval):
+                self._start()
@@ -0,0 +1,50 @@
+from typing import Any, List, Sequence
+
+import numpy as np
+import pandas as pd
+from pymysql.constants import FIELD_TYPE
+
+INTEGER_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.INT24,
+                 FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR}
+FLOAT_TYPES = {FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE}
+DECIMAL_TYPES = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+DATETIME_TYPES = {FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP, FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE}
+TIME_TYPES = {FIELD_TYPE.TIME}
+
+
+def to_column(type_code: int, values: List[Any]):
+    """Convert one column of raw cursor values to a typed array."""
+    if type_code in INTEGER_TYPES:
+        return _integer_column(values)
+    if type_code in FLOAT_TYPES:
+        return np.array(values, dtype='float64')
+    if type_code in DECIMAL_TYPES:
+        # Decimals stay exact, as the dict path returns them; float64 would round money columns
+        return np.array(values, dtype=object)
+    if type_code in DATETIME_TYPES:
+        # pymysql returns zero dates as strings; those become NaT
+        return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce').array
+    if type_code in TIME_TYPES:
+        return pd.to_timedelta(pd.Series(values, dtype=object), errors='coerce').array
+    return np.array(values, dtype=object)
+
+
+def _integer_column(values: List[Any]):
+    """int64, or uint64 for BIGINT UNSIGNED values past its range; object if neither fits."""
+    nullable = any(value is None for value in values)
+    for dtype in ('Int64', 'UInt64') if nullable else ('int64', 'uint64'):
+        try:
+            return pd.array(values, dtype=dtype) if nullable else np.array(values, dtype=dtype)
+        except (OverflowError, TypeError, ValueError):
+            continue
+    return np.array(values, dtype=object)
+
+
+def build_frame(description: Sequence[tuple], column_values: List[List[Any]]) -> pd.DataFrame:
+    """Build a DataFrame from per-column value lists using cursor.description types."""
+    names = [desc[0] for desc in description]
+    arrays = {i: to_column(desc[1], values) for i, (desc, values) in enumerate(zip(description, column_values))}
+    frame = pd.DataFrame(arrays, copy=False)
+    # Joins can produce duplicate column names, so assign them after construction
+    frame.columns = names
+    return frame
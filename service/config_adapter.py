@@ -1,16 +1,30 @@
 import os
+import threading
 from dotenv import load_dotenv
 
 class ConfigAdapter:
+    # .env and the environment are read once per process and shared by every adapter
+    _env_snapshot = None
+    _load_lock = threading.Lock()
+
     def __init__(self) -> None:
+        if ConfigAdapter._env_snapshot is None:
+            with ConfigAdapter._load_lock:
+                if ConfigAdapter._env_snapshot is None:
+                    ConfigAdapter._env_snapshot = self._load()
+        self._env = ConfigAdapter._env_snapshot
+
+    @staticmethod
+    def _load():
         env = dict(os.environ.items())
 
         # Load default environment variables from .env file
         load_dotenv()
-        self._env = dict(os.environ.items())
+        loaded = dict(os.environ.items())
 
         # Update environment variables with env
-        self._env.update(env)
+        loaded.update(env)
+        return loaded
 
-    def get_config(self, key):
-        return self._env.get(key)
+    def get_config(self, key, default=None):
+        return self._env.get(key, default)
@@ -0,0 +1,186 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections with checkout/checkin."""
+
+    def __init__(self, factory: Callable[[], Any], logger: logging.Logger,
+                 max_size: int = 5, wait_timeout: float = 10.0, idle_timeout: float = 300.0,
+                 validator: Optional[Callable[[Any], None]] = None, validate_after: float = 30.0):
+        self._factory = factory
+        self.logger = logger
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        self._validator = validator
+        self.validate_after = validate_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, generation, last_used)
+        self._checked_out = {}  # id(connection) -> generation
+        self._generation = 0
+
+        self._acquire_count = 0
+        self._wait_count = 0
+        self._timeout_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._validation_count = 0
+        self._validation_failures = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool is not full."""
+        start = time.monotonic()
+        deadline = start + self.wait_timeout
+        expired = []
+        connection = None
+        last_used = None
+        timed_out = False
+        with self._cond:
+            while True:
+                expired.extend(self._pop_expired())
+                if self._idle:
+                    connection, generation, last_used = self._idle.pop()
+                    break
+                if len(self._checked_out) < self.max_size:
+                    generation = self._generation
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    self._timeout_count += 1
+                    break
+                self._cond.wait(remaining)
+
+            if not timed_out:
+                waited = time.monotonic() - start
+                self._acquire_count += 1
+                self._total_wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+                if waited > 0.001:
+                    self._wait_count += 1
+                # Reserve the slot before opening the connection outside the lock
+                token = object() if connection is None else connection
+                self._checked_out[id(token)] = generation
+
+        self._close_all(expired)
+        if timed_out:
+            raise PoolTimeoutError(f"No database connection available after {self.wait_timeout} seconds")
+
+        # Only connections that sat idle long enough to go stale are checked
+        if connection is not None and time.monotonic() - last_used > self.validate_after:
+            if not self._validate(connection):
+                self._close_all([connection])
+                connection = None
+
+        if connection is None:
+            try:
+                connection = self._factory()
+            except Exception:
+                with self._cond:
+                    self._checked_out.pop(id(token), None)
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._checked_out[id(connection)] = self._checked_out.pop(id(token))
+        return connection
+
+    def release(self, connection, discard: bool = False):
+        """Return a checked-out connection. Broken or stale connections are closed."""
+        with self._cond:
+            generation = self._checked_out.pop(id(connection), None)
+            keep = (
+                not discard
+                and generation == self._generation
+                and getattr(connection, 'open', True)
+            )
+            if keep:
+                self._idle.append((connection, generation, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            self._close_all([connection])
+
+    def clear(self):
+        """Close idle connections and mark checked-out ones as stale."""
+        with self._cond:
+            self._generation += 1
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def validate_idle(self) -> int:
+        """Ping idle connections older than `validate_after`. Returns how many failed."""
+        now = time.monotonic()
+        with self._cond:
+            stale = [entry for entry in self._idle if now - entry[2] > self.validate_after]
+            for entry in stale:
+                self._idle.remove(entry)
+                self._checked_out[id(entry[0])] = entry[1]
+
+        failed = 0
+        for connection, _, _ in stale:
+            if self._validate(connection):
+                self.release(connection)
+            else:
+                failed += 1
+                self.release(connection, discard=True)
+        return failed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "in_use": len(self._checked_out),
+                "idle": len(self._idle),
+                "acquired": self._acquire_count,
+                "waited": self._wait_count,
+                "timeouts": self._timeout_count,
+                "total_wait_time": round(self._total_wait_time, 4),
+                "avg_wait_time": round(self._total_wait_time / self._acquire_count, 4) if self._acquire_count else 0.0,
+                "max_wait_time": round(self._max_wait_time, 4),
+                "validations": self._validation_count,
+                "validation_failures": self._validation_failures,
+            }
+
+    def _pop_expired(self):
+        # Idle connections are ordered oldest first; most recently used are reused first
+        now = time.monotonic()
+        expired = []
+        while self._idle and now - self._idle[0][2] > self.idle_timeout:
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def _validate(self, connection) -> bool:
+        if self._validator is None:
+            return True
+        try:
+            self._validator(connection)
+            ok = True
+        except Exception as e:
+            self.logger.warning(f"Pooled connection failed liveness check: {e}")
+            ok = False
+        with self._cond:
+            self._validation_count += 1
+            if not ok:
+                self._validation_failures += 1
+        return ok
+
+    def _close_all(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing pooled connection: {e}")
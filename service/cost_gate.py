@@ -0,0 +1,139 @@
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_HAS_LIMIT = re.compile(r'\bLIMIT\s+\d+', re.IGNORECASE)
+# Matched left to right, so `--` inside a string is not taken for a comment
+_LITERAL_OR_COMMENT = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|/\*.*?\*/|--[^\n]*|#[^\n]*", re.S)
+
+
+def fingerprint(query: str) -> str:
+    """SQL with literals replaced by `?`, so plans are shared across parameter values."""
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    return ' '.join(query.split()).rstrip('; ').lower()
+
+
+def _top_level(query: str) -> str:
+    """Same-length copy of `query` with literals, comments and the insides of parentheses blanked."""
+    masked = _LITERAL_OR_COMMENT.sub(lambda match: ' ' * len(match.group()), query)
+    depth = 0
+    chars = []
+    for char in masked:
+        if char == ')':
+            depth -= 1
+        chars.append(char if depth == 0 or char in '()' else ' ')
+        if char == '(':
+            depth += 1
+    return ''.join(chars)
+
+
+def has_limit(query: str) -> bool:
+    """Whether the outer statement has a LIMIT; one in a subquery does not bound it."""
+    return _HAS_LIMIT.search(_top_level(query)) is not None
+
+
+def add_limit(query: str, limit: int) -> str:
+    """Append `LIMIT limit` to the outer statement, before any trailing comment or semicolon."""
+    end = len(_top_level(query).rstrip(' \t\r\n;'))
+    return f"{query[:end]} LIMIT {limit}"
+
+
+def analyze_plan(plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Estimate rows examined from traditional EXPLAIN output and list unindexed full scans."""
+    rows_per_select = defaultdict(lambda: 1.0)
+    full_scans = []
+    for step in plan:
+        rows = float(step.get('rows') or 0)
+        filtered = float(step.get('filtered') or 100) / 100
+        # Joined tables in one SELECT form nested loops, so their row estimates multiply
+        rows_per_select[step.get('id')] *= max(rows * filtered, 1.0) if rows else 1.0
+        if step.get('type') == 'ALL' and step.get('table'):
+            full_scans.append({"table": step['table'], "rows": int(rows), "possible_keys": step.get('possible_keys')})
+    return {
+        "estimated_rows": int(sum(rows_per_select.values())) if rows_per_select else 0,
+        "full_scans": full_scans,
+    }
+
+
+class CostGate:
+    """Pre-flight EXPLAIN check that allows, limits or rejects a generated query.
+
+    Plans are cached per SQL fingerprint so repeated questions skip the extra round trip.
+    """
+
+    def __init__(self, logger: logging.Logger, reject_rows: int = 50_000_000, limit_rows: int = 1_000_000,
+                 full_scan_rows: int = 1_000_000, auto_limit: int = 1000, cache_size: int = 1000, cache_ttl: float = 3600):
+        self.logger = logger
+        self.reject_rows = reject_rows
+        self.limit_rows = limit_rows
+        self.full_scan_rows = full_scan_rows
+        self.auto_limit = auto_limit
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._plans = OrderedDict()  # fingerprint -> (analysis, stored_at)
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def _analysis(self, query: str, explain: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        key = fingerprint(query)
+        now = time.time()
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached and now - cached[1] <= self.cache_ttl:
+                self._plans.move_to_end(key)
+                self._counts['plan_cache_hits'] += 1
+                return cached[0]
+
+        plan = explain(query)
+        if 'error' in plan:
+            return plan
+        analysis = analyze_plan(plan['rows'])
+        with self._lock:
+            self._counts['plan_cache_misses'] += 1
+            self._plans[key] = (analysis, now)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        return analysis
+
+    def check(self, query: str, explain: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return {"action": "allow" | "limit" | "reject", "query", "reason", ...} for `query`.
+
+        `explain` runs EXPLAIN and returns an execution result ({"rows": [...]} or {"error": ...}).
+        """
+        analysis = self._analysis(query, explain)
+        if 'error' in analysis:
+            # The statement would fail anyway; report it without executing
+            with self._lock:
+                self._counts['explain_errors'] += 1
+            return {"action": "reject", "query": query, "reason": analysis['error'],
+                    "error_type": analysis.get('error_type', 'sql')}
+        estimated = analysis["estimated_rows"]
+        big_scans = [scan for scan in analysis["full_scans"] if scan["rows"] > self.full_scan_rows]
+        result = {"action": "allow", "query": query, "reason": None, "error_type": None, **analysis}
+
+        if estimated > self.reject_rows:
+            result.update(action="reject", error_type="rejected", reason=(
+                f"Query would examine about {estimated:,} rows (limit {self.reject_rows:,})"
+                + (f"; full scan of {', '.join(scan['table'] for scan in big_scans)} without an index" if big_scans else "")
+            ))
+        elif (estimated > self.limit_rows or big_scans) and not has_limit(query):
+            result.update(action="limit", query=add_limit(query, self.auto_limit), reason=(
+                f"Query would examine about {estimated:,} rows; limited to {self.auto_limit} results"
+            ))
+
+        with self._lock:
+            self._counts[result["action"]] += 1
+        if result["action"] != "allow":
+            self.logger.info(f"Pre-flight {result['action']}: {result['reason']}")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached_plans": len(self._plans), **self._counts}
@@ -0,0 +1,140 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import logging
+from typing import Any, Dict
+
+FIELDS = ('timestamp', 'question', 'error', 'model', 'exception')
+
+
+class ErrorLog:
+    """Appends error records from a background writer so request threads never wait on disk I/O.
+
+    Records go through a bounded queue and are dropped (and counted) when it is full.
+    The file is written as escaped CSV or JSON lines, flushed once per batch, and
+    rotated to `path.1` ... `path.N` by size or age.
+    """
+
+    def __init__(self, path: str, logger: logging.Logger, fmt: str = 'csv', max_size: int = 10000,
+                 batch_size: int = 200, flush_interval: float = 1.0, max_bytes: int = 10 * 1024 * 1024,
+                 rotate_interval: float = 86400, backups: int = 5):
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported error log format: {fmt}")
+        self.path = path
+        self.logger = logger
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._file = None
+        self._opened_at = 0.0
+        self._written = 0
+        self._dropped = 0
+        self._write_errors = 0
+        self._rotations = 0
+        self._worker = threading.Thread(target=self._run, name="error-log-writer", daemon=True)
+        self._worker.start()
+
+    def record(self, question: str, error, model: str = '', **fields) -> bool:
+        """Queue an error record; returns False if it was dropped because the queue is full."""
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'question': question,
+            'error': str(error),
+            'model': model,
+            'exception': type(error).__name__ if isinstance(error, BaseException) else '',
+            **fields,
+        }
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather whatever else arrives shortly so a burst is written with one flush
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except OSError as e:
+                with self._lock:
+                    self._write_errors += 1
+                self.logger.warning(f"Could not write {len(batch)} records to {self.path}: {e}")
+                self._close_file()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        if self._file is not None and self._should_rotate():
+            self._rotate()
+        if self._file is None:
+            self._open_file()
+        if self.fmt == 'csv':
+            writer = csv.DictWriter(self._file, fieldnames=FIELDS, extrasaction='ignore')
+            if self._file.tell() == 0:
+                writer.writeheader()
+            writer.writerows(batch)
+        else:
+            self._file.writelines(json.dumps(entry, default=str) + '\n' for entry in batch)
+        self._file.flush()
+        with self._lock:
+            self._written += len(batch)
+
+    def _open_file(self):
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _should_rotate(self) -> bool:
+        return self._file.tell() >= self.max_bytes or time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self):
+        self._close_file()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        with self._lock:
+            self._rotations += 1
+
+    def flush(self):
+        """Block until every queued record has been written (for shutdown and scripts)."""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "write_errors": self._write_errors,
+                "rotations": self._rotations,
+            }
@@ -0,0 +1,165 @@
+import csv
+import datetime
+import decimal
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pymysql.constants import FIELD_TYPE
+
+from service.columnar import DATETIME_TYPES, DECIMAL_TYPES, FLOAT_TYPES, INTEGER_TYPES, TIME_TYPES
+from service.projection import is_hidden_column
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATS = ('csv', 'parquet') if pa is not None else ('csv',)
+
+
+class CsvWriter:
+    def __init__(self, path: str, columns: List[str], description: Sequence[tuple], unsigned: Sequence[bool]):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows: List[Sequence[Any]]):
+        self._writer.writerows(
+            [value.decode('utf-8', 'replace') if isinstance(value, bytes) else value for value in row] for row in rows
+        )
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes each chunk as a row group, with a schema fixed up front from the cursor description."""
+
+    def __init__(self, path: str, columns: List[str], description: Sequence[tuple], unsigned: Sequence[bool]):
+        self._types = [_arrow_type(desc, flag) for desc, flag in zip(description, unsigned)]
+        self._schema = pa.schema([pa.field(name, type_) for name, type_ in zip(_unique(columns), self._types)])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='snappy')
+        self._path = path
+
+    def write(self, rows: List[Sequence[Any]]):
+        arrays = [
+            pa.array([_arrow_value(row[i], type_) for row in rows], type=type_)
+            for i, type_ in enumerate(self._types)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def tell(self) -> int:
+        return os.path.getsize(self._path)
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter}
+
+
+def _unique(columns: List[str]) -> List[str]:
+    # Joins can repeat a column name, which Parquet does not allow
+    seen = {}
+    names = []
+    for name in columns:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(name if count == 0 else f"{name}_{count}")
+    return names
+
+
+def _arrow_type(desc: tuple, unsigned: bool = False):
+    type_code, precision, scale = desc[1], desc[4], desc[5]
+    if type_code in INTEGER_TYPES:
+        # Only BIGINT UNSIGNED goes past int64
+        return pa.uint64() if unsigned and type_code == FIELD_TYPE.LONGLONG else pa.int64()
+    if type_code in FLOAT_TYPES:
+        return pa.float64()
+    if type_code in DECIMAL_TYPES:
+        return pa.decimal128(min(max(precision or 38, 1), 38), scale or 0)
+    if type_code in DATETIME_TYPES:
+        return pa.timestamp('us')
+    if type_code in TIME_TYPES:
+        return pa.duration('us')
+    return pa.string()
+
+
+def _arrow_value(value, type_):
+    if value is None:
+        return None
+    if pa.types.is_string(type_) and not isinstance(value, str):
+        return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+    if pa.types.is_timestamp(type_) and not isinstance(value, datetime.datetime):
+        # DATE columns arrive as date objects; zero dates as strings
+        return datetime.datetime.combine(value, datetime.time()) if isinstance(value, datetime.date) else None
+    if pa.types.is_decimal(type_) and not isinstance(value, decimal.Decimal):
+        return decimal.Decimal(str(value))
+    return value
+
+
+def export_stream(result: Dict[str, Any], path: str, fmt: str = 'csv',
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  progress_interval: float = 0.5) -> Dict[str, Any]:
+    """Write an `execute_stream(..., as_tuples=True)` result to `path` chunk by chunk.
+
+    Hidden `_id`/`_pk` columns are dropped. `progress(rows, bytes)` is called at most
+    every `progress_interval` seconds. The stream is always closed, and the file is
+    removed if writing it raises.
+    """
+    stream = result['stream']
+    keep = [i for i, name in enumerate(result['columns']) if not is_hidden_column(name)]
+    columns = [result['columns'][i] for i in keep]
+    description = [result['description'][i] for i in keep]
+    flags = result.get('unsigned') or [False] * len(result['columns'])
+    unsigned = [flags[i] for i in keep]
+    start = time.time()
+    last_report = 0.0
+    rows_written = 0
+    try:
+        writer = WRITERS[fmt](path, columns, description, unsigned)
+        try:
+            for chunk in stream:
+                writer.write([[row[i] for i in keep] for row in chunk])
+                rows_written += len(chunk)
+                if progress is not None and time.time() - last_report >= progress_interval:
+                    last_report = time.time()
+                    progress(rows_written, writer.tell())
+        finally:
+            writer.close()
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    finally:
+        stream.close()
+    size = os.path.getsize(path)
+    if progress is not None:
+        progress(rows_written, size)
+    return {
+        "path": path,
+        "format": fmt,
+        "rows": rows_written,
+        "bytes": size,
+        "seconds": round(time.time() - start, 2),
+        "error": stream.error,
+        "error_type": stream.error_type,
+    }
+
+
+def remove_old_exports(directory: str, max_age: float):
+    """Delete exports older than `max_age` seconds."""
+    now = time.time()
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and now - entry.stat().st_mtime > max_age:
+                os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,52 @@
+"""Builds the result cache, cost gate and query executor from configuration.
+
+Shared by mini_front and the query gateway (service.gateway), so both read the
+same config keys with the same defaults.
+"""
+import logging
+from typing import Optional
+
+from service.config_adapter import ConfigAdapter
+from service.cost_gate import CostGate
+from service.result_cache import ResultCache
+from service.schema_catalog import SchemaCatalog
+
+
+def build_result_cache() -> Optional[ResultCache]:
+    """None when RESULT_CACHE_TTL is 0."""
+    config = ConfigAdapter()
+    ttl = float(config.get_config('RESULT_CACHE_TTL', 300))
+    if ttl <= 0:
+        return None
+    return ResultCache(ttl=ttl, max_bytes=int(config.get_config('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
+
+
+def build_cost_gate(logger: logging.Logger) -> Optional[CostGate]:
+    """None when PREFLIGHT_ENABLED is not 'true'."""
+    config = ConfigAdapter()
+    if config.get_config('PREFLIGHT_ENABLED', 'true').lower() != 'true':
+        return None
+    return CostGate(
+        logger=logger,
+        reject_rows=int(config.get_config('PREFLIGHT_REJECT_ROWS', 50_000_000)),
+        limit_rows=int(config.get_config('PREFLIGHT_LIMIT_ROWS', 1_000_000)),
+        full_scan_rows=int(config.get_config('PREFLIGHT_FULL_SCAN_ROWS', 1_000_000)),
+        auto_limit=int(config.get_config('PREFLIGHT_AUTO_LIMIT', 1000)),
+    )
+
+
+def build_executor(db_manager, logger: logging.Logger, result_cache: Optional[ResultCache] = None,
+                   cost_gate: Optional[CostGate] = None):
+    """ExecuteQuery on `db_manager`, with a schema catalog unless SCHEMA_CATALOG_ENABLED is not 'true'."""
+    # Imported here so callers can import this module without pymysql, paramiko and sshtunnel
+    from service.MySQLDatabase import ExecuteQuery
+
+    config = ConfigAdapter()
+    catalog = None
+    if config.get_config('SCHEMA_CATALOG_ENABLED', 'true').lower() == 'true':
+        catalog = SchemaCatalog(
+            ExecuteQuery(db_manager, logger=logger).load_catalog,
+            logger=logger,
+            ttl=float(config.get_config('SCHEMA_CATALOG_TTL', 600)),
+        )
+    return ExecuteQuery(db_manager, logger=logger, result_cache=result_cache, cost_gate=cost_gate, catalog=catalog)
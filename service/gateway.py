@@ -0,0 +1,291 @@
+"""Local query gateway: one process owns the SSH tunnel, the MySQL pool and the caches,
+and Streamlit processes reach it over a Unix domain socket (see ExecuteQuery.client).
+
+    python -m service.gateway
+
+Messages are length-prefixed pickles. Row results travel column by column, so column
+names are sent once instead of once per row. The socket is created with mode 0600, so
+only processes running as the same user can connect.
+"""
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+_HEADER = struct.Struct('!I')
+
+# ExecuteQuery methods a client may call
+METHODS = ('execute', 'execute_columnar', 'execute_stream', 'preflight', 'load_catalog', 'cancel', 'is_cancelled', 'stats')
+
+
+class GatewayError(Exception):
+    pass
+
+
+def send_message(sock: socket.socket, message: Any):
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _read_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise GatewayError("Gateway connection closed")
+        received += count
+    return bytes(buffer)
+
+
+def receive_message(sock: socket.socket) -> Any:
+    size, = _HEADER.unpack(_read_exactly(sock, _HEADER.size))
+    return pickle.loads(_read_exactly(sock, size))
+
+
+def encode_rows(rows: List[Any]) -> Tuple[Optional[List[str]], List[List[Any]]]:
+    """Dict or tuple rows -> (keys or None, one value list per column)."""
+    if not rows:
+        return None, []
+    keys = list(rows[0]) if isinstance(rows[0], dict) else None
+    values = (row.values() for row in rows) if keys is not None else rows
+    return keys, [list(column) for column in zip(*values)]
+
+
+def decode_rows(encoded: Tuple[Optional[List[str]], List[List[Any]]]) -> List[Any]:
+    keys, columns = encoded
+    if not columns:
+        return []
+    if keys is None:
+        return list(zip(*columns))
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def encode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    if 'rows' in result:
+        result = dict(result, rows=encode_rows(result['rows']))
+    return result
+
+
+def decode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    if 'rows' in result:
+        result['rows'] = decode_rows(result['rows'])
+    return result
+
+
+class RemoteRowStream:
+    """Client side of a RowStream: chunks arrive from the gateway until it reports the end."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self.row_count = 0
+        self.truncated = False
+        self.error = None
+        self.error_type = None
+        self.execution_time = None
+        self._iterator = self._chunks()
+
+    def __iter__(self):
+        return self._iterator
+
+    def _chunks(self):
+        try:
+            while True:
+                kind, value = receive_message(self._sock)
+                if kind == 'chunk':
+                    rows = decode_rows(value)
+                    self.row_count += len(rows)
+                    yield rows
+                else:
+                    for key, item in value.items():
+                        setattr(self, key, item)
+                    return
+        except (OSError, GatewayError) as e:
+            self.error = str(e)
+            self.error_type = 'connection'
+        finally:
+            self._close_socket()
+
+    def _close_socket(self):
+        if self._sock is not None:
+            # The gateway notices on its next send and stops the query
+            self._sock.close()
+            self._sock = None
+
+    def close(self):
+        self._iterator.close()
+        self._close_socket()
+
+
+class GatewayClient:
+    """Calls ExecuteQuery methods in the gateway, one Unix socket connection per call."""
+
+    def __init__(self, path: str, connect_timeout: float = 5.0):
+        self.path = path
+        self.connect_timeout = connect_timeout
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        # Queries carry their own time budget, enforced by the gateway
+        sock.settimeout(None)
+        return sock
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        try:
+            sock = self._connect()
+        except OSError as e:
+            if method.startswith('execute'):
+                return {"error": f"Query gateway unavailable: {e}", "error_type": "connection"}
+            raise GatewayError(f"Query gateway unavailable: {e}") from e
+        try:
+            send_message(sock, (method, args, kwargs))
+            kind, value = receive_message(sock)
+        except (OSError, GatewayError) as e:
+            sock.close()
+            if method.startswith('execute'):
+                return {"error": f"Query gateway connection lost: {e}", "error_type": "connection"}
+            raise GatewayError(f"Query gateway connection lost: {e}") from e
+        if kind == 'stream':
+            value['stream'] = RemoteRowStream(sock)
+            return value
+        sock.close()
+        if kind == 'error':
+            raise GatewayError(value)
+        return decode_result(value) if isinstance(value, dict) else value
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: GatewayServer = self.server
+        with server.slots:
+            try:
+                method, args, kwargs = receive_message(self.request)
+            except (OSError, GatewayError, pickle.UnpicklingError):
+                return
+            if method not in METHODS:
+                send_message(self.request, ('error', f"Unknown method {method!r}"))
+                return
+            try:
+                target = server.stats if method == 'stats' else getattr(server.executor, method)
+                result = target(*args, **kwargs)
+            except Exception as e:
+                server.logger.exception(f"Gateway call {method} failed")
+                send_message(self.request, ('error', str(e)))
+                return
+            if isinstance(result, dict) and 'stream' in result:
+                self._send_stream(result)
+            else:
+                send_message(self.request, ('ok', encode_result(result) if isinstance(result, dict) else result))
+
+    def _send_stream(self, result: Dict[str, Any]):
+        stream = result.pop('stream')
+        try:
+            send_message(self.request, ('stream', result))
+            for chunk in stream:
+                send_message(self.request, ('chunk', encode_rows(chunk)))
+            send_message(self.request, ('end', {
+                "truncated": stream.truncated,
+                "error": stream.error,
+                "error_type": stream.error_type,
+                "execution_time": stream.execution_time,
+            }))
+        except OSError:
+            pass  # client went away
+        finally:
+            stream.close()
+
+
+def _is_listening(path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1.0)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class GatewayServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves one ExecuteQuery to local clients; at most `max_clients` calls run at once."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, executor, logger: logging.Logger, max_clients: int = 64):
+        if os.path.exists(path):
+            if _is_listening(path):
+                raise GatewayError(f"Another query gateway is already listening on {path}")
+            os.remove(path)  # left behind by a gateway that did not shut down cleanly
+        self.executor = executor
+        self.logger = logger
+        self.slots = threading.BoundedSemaphore(max_clients)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def stats(self) -> Dict[str, Any]:
+        db_manager = self.executor.db_manager
+        return {
+            "pool": db_manager.pool_stats(),
+            "health": db_manager.health_stats(),
+            "result_cache": self.executor.result_cache.stats() if self.executor.result_cache is not None else None,
+            "schema_catalog": self.executor.catalog.stats() if self.executor.catalog is not None else None,
+            "single_flight": self.executor.in_flight.stats(),
+        }
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+
+def main():
+    from service.config_adapter import ConfigAdapter
+    from service.factory import build_cost_gate, build_executor, build_result_cache
+    from service.metrics import metrics
+    from service.MySQLDatabase import DBConnectionManager
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s| %(levelname)s | %(message)s')
+    logger = logging.getLogger("gateway")
+    config = ConfigAdapter()
+    db_manager = DBConnectionManager(logger=logger)
+    executor = build_executor(db_manager, logger, result_cache=build_result_cache(), cost_gate=build_cost_gate(logger))
+    catalog = executor.catalog
+
+    port = int(config.get_config('GATEWAY_METRICS_PORT', 0))
+    if port:
+        metrics.logger = logger
+        metrics.start_server(config.get_config('METRICS_HOST', '127.0.0.1'), port)
+
+    path = config.get_config('QUERY_GATEWAY_SOCKET', '/tmp/eli_gateway.sock')
+    server = GatewayServer(path, executor, logger=logger, max_clients=int(config.get_config('GATEWAY_MAX_CLIENTS', 64)))
+    logger.info(f"Query gateway listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if catalog is not None:
+            catalog.stop()
+        db_manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
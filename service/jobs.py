@@ -0,0 +1,226 @@
+import contextvars
+import itertools
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class SystemBusyError(Exception):
+    pass
+
+
+# Job being run by the current worker thread, so stage limits can report progress without threading it through
+current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class Job:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, executor: 'JobExecutor', job_id: int, user: str, func: Callable[[], Any],
+                 on_cancel: Optional[Callable[[], None]]):
+        self._executor = executor
+        self.id = job_id
+        self.user = user
+        self._func = func
+        self._on_cancel = on_cancel
+        self.status = Job.QUEUED
+        self.stage = Job.QUEUED
+        self.progress = None  # free-form progress text set by long-running work, e.g. exports
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def position(self) -> Optional[int]:
+        """1-based place in the queue, or None once the job has started."""
+        return self._executor.position(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """Drop the job if it is still queued, otherwise ask the running work to stop."""
+        if self._executor._dequeue(self):
+            self._finish(Job.CANCELLED)
+        elif not self.done and self._on_cancel is not None:
+            self._on_cancel()
+
+    def _finish(self, status: str, result: Any = None, error: Optional[BaseException] = None):
+        self.status = status
+        self.stage = status
+        self.result = result
+        self.error = error
+        self._done.set()
+
+
+class JobExecutor:
+    """Shared worker pool for answering questions, with admission control.
+
+    Jobs wait in a bounded queue that is served round-robin per user, so one user's
+    burst cannot starve the others. LLM calls, DB executions and full-result exports
+    inside a job take a slot from separate limits (see `limit`), so long exports
+    cannot hold the slots interactive queries need. Submitting to a full queue fails fast
+    with SystemBusyError.
+    """
+
+    def __init__(self, logger: logging.Logger, workers: int = 8, llm_concurrency: int = 4,
+                 db_concurrency: int = 5, export_concurrency: int = 1, max_queue: int = 50,
+                 max_per_user: int = 2):
+        self.logger = logger
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self._limits = {
+            'llm': threading.BoundedSemaphore(llm_concurrency),
+            'db': threading.BoundedSemaphore(db_concurrency),
+            'export': threading.BoundedSemaphore(export_concurrency),
+        }
+        self._in_use = {kind: 0 for kind in self._limits}
+        self._cond = threading.Condition()
+        self._queues: 'OrderedDict[str, deque]' = OrderedDict()  # user -> queued jobs, in round-robin order
+        self._queued = 0
+        self._running = 0
+        self._ids = itertools.count(1)
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._total_queue_wait = 0.0
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, user: str, func: Callable[[], Any], on_cancel: Optional[Callable[[], None]] = None) -> Job:
+        """Queue `func` for `user`; raises SystemBusyError when the queue or the user's share is full."""
+        with self._cond:
+            user_queue = self._queues.get(user)
+            if self._queued >= self.max_queue or (user_queue and len(user_queue) >= self.max_per_user):
+                self._rejected += 1
+                raise SystemBusyError("The system is busy right now. Please try again in a moment.")
+            job = Job(self, next(self._ids), user, func, on_cancel)
+            if user_queue is None:
+                user_queue = self._queues[user] = deque()
+            user_queue.append(job)
+            self._queued += 1
+            self._submitted += 1
+            self._cond.notify()
+        return job
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while not self._queued:
+                self._cond.wait()
+            # Take from the user at the head of the rotation, then move them to the back
+            user, user_queue = next(iter(self._queues.items()))
+            job = user_queue.popleft()
+            if user_queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            self._queued -= 1
+            self._running += 1
+            job.status = job.stage = Job.RUNNING
+            job.started_at = time.monotonic()
+            self._total_queue_wait += job.started_at - job.submitted_at
+            return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            token = current_job.set(job)
+            try:
+                result = job._func()
+            except Exception as e:
+                job._finish(Job.FAILED, error=e)
+            else:
+                job._finish(Job.DONE, result=result)
+            finally:
+                current_job.reset(token)
+                with self._cond:
+                    self._running -= 1
+                    if job.status == Job.DONE:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+    def _dequeue(self, job: Job) -> bool:
+        with self._cond:
+            user_queue = self._queues.get(job.user)
+            if not user_queue or job not in user_queue:
+                return False
+            user_queue.remove(job)
+            if not user_queue:
+                del self._queues[job.user]
+            self._queued -= 1
+            self._cancelled += 1
+            return True
+
+    def position(self, job: Job) -> Optional[int]:
+        with self._cond:
+            if job.status != Job.QUEUED:
+                return None
+            # Round-robin order: first job of every user in rotation, then the second, ...
+            position = 0
+            for depth in itertools.count():
+                remaining = False
+                for user_queue in self._queues.values():
+                    if depth < len(user_queue):
+                        remaining = True
+                        position += 1
+                        if user_queue[depth] is job:
+                            return position
+                if not remaining:
+                    return None
+
+    @contextmanager
+    def limit(self, kind: str):
+        """Hold one `kind` ('llm', 'db' or 'export') slot for the block, recording the stage on the current job."""
+        job = current_job.get()
+        semaphore = self._limits[kind]
+        if job is not None:
+            job.stage = f"waiting:{kind}"
+        semaphore.acquire()
+        try:
+            with self._cond:
+                self._in_use[kind] += 1
+            if job is not None:
+                job.stage = kind
+            yield
+        finally:
+            with self._cond:
+                self._in_use[kind] -= 1
+            semaphore.release()
+            if job is not None:
+                job.stage = Job.RUNNING
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = self._completed + self._failed + self._running
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "llm_in_use": self._in_use['llm'],
+                "db_in_use": self._in_use['db'],
+                "export_in_use": self._in_use['export'],
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "avg_queue_wait": round(self._total_queue_wait / started, 4) if started else 0.0,
+            }
@@ -0,0 +1,135 @@
+import contextvars
+import json
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Model of the question being answered, so DB-layer spans can be labelled without threading it through
+current_model = contextvars.ContextVar('current_model', default='')
+
+
+class LatencySummary:
+    """Sliding-window latency samples plus lifetime count and sum."""
+
+    def __init__(self, window: int = 2048):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self) -> Dict[float, float]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: samples[min(len(samples) - 1, int(len(samples) * q))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """Per-stage latency summaries keyed by (stage, model, outcome)."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._summaries: Dict[Tuple[str, str, str], LatencySummary] = defaultdict(LatencySummary)
+        self._server = None
+
+    def observe(self, stage: str, seconds: float, outcome: str = 'ok', model: Optional[str] = None, **fields):
+        model = current_model.get() if model is None else model
+        with self._lock:
+            self._summaries[(stage, model, outcome)].observe(seconds)
+        self.logger.info(json.dumps({
+            "event": "span",
+            "stage": stage,
+            "model": model,
+            "outcome": outcome,
+            "duration_ms": round(seconds * 1000, 2),
+            **fields,
+        }, default=str))
+
+    @contextmanager
+    def span(self, stage: str, model: Optional[str] = None, **fields):
+        """Time a block; the outcome is 'error' if it raises, or whatever the block sets on the yielded dict."""
+        start = time.perf_counter()
+        state = {"outcome": "ok"}
+        try:
+            yield state
+        except BaseException:
+            state["outcome"] = "error"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, state["outcome"], model, **fields)
+
+    @contextmanager
+    def model(self, model: str):
+        token = current_model.set(model)
+        try:
+            yield
+        finally:
+            current_model.reset(token)
+
+    def snapshot(self) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        with self._lock:
+            return {
+                key: {"count": summary.count, "sum": summary.total, **summary.quantiles()}
+                for key, summary in self._summaries.items()
+            }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP stage_latency_seconds Latency of each stage of answering a question.",
+            "# TYPE stage_latency_seconds summary",
+        ]
+        for (stage, model, outcome), values in sorted(self.snapshot().items()):
+            labels = f'stage="{_escape(stage)}",model="{_escape(model)}",outcome="{_escape(outcome)}"'
+            for q in QUANTILES:
+                lines.append(f'stage_latency_seconds{{{labels},quantile="{q}"}} {values[q]:.6f}')
+            lines.append(f'stage_latency_seconds_sum{{{labels}}} {values["sum"]:.6f}')
+            lines.append(f'stage_latency_seconds_count{{{labels}}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, host: str, port: int):
+        """Serve /metrics in Prometheus text format from a daemon thread."""
+        if self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # Another app process on this host already serves the port
+            self.logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        self.logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,112 @@
+import datetime
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from service.metrics import metrics
+
+
+def parse_window(spec: Optional[str]) -> Optional[Tuple[datetime.time, datetime.time]]:
+    """'01:00-06:00' -> (01:00, 06:00); empty means any time. Windows may wrap past midnight."""
+    if not spec or not spec.strip():
+        return None
+    start, end = (datetime.time.fromisoformat(part.strip()) for part in spec.split('-'))
+    return start, end
+
+
+def in_window(window: Optional[Tuple[datetime.time, datetime.time]], now: Optional[datetime.datetime] = None) -> bool:
+    if window is None:
+        return True
+    current = (now or datetime.datetime.now()).time()
+    start, end = window
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+class PrewarmScheduler:
+    """Re-answers the most frequently asked questions in the background so their results stay cached.
+
+    Runs at most once per `interval` seconds, only inside the off-peak `window`, and
+    never more than `concurrency` questions at a time.
+    """
+
+    def __init__(self, answer: Callable[[str, str], Dict[str, Any]],
+                 top_questions: Callable[[int], List[Dict[str, Any]]], logger: logging.Logger,
+                 interval: float = 3600, top_n: int = 20, concurrency: int = 2,
+                 window: Optional[Tuple[datetime.time, datetime.time]] = None):
+        self._answer = answer
+        self._top_questions = top_questions
+        self.logger = logger
+        self.interval = interval
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.window = window
+        self.poll_interval = min(60.0, interval)
+        self._lock = threading.Lock()
+        self._last_run = None
+        self._last_run_at = None
+        self._last_duration = None
+        self._runs = 0
+        self._warmed = 0
+        self._failed = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prewarm-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            if self._last_run is not None and time.monotonic() - self._last_run < self.interval:
+                continue
+            if not in_window(self.window):
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.warning(f"Pre-warm run failed: {e}")
+
+    def run_once(self) -> Dict[str, int]:
+        """Answer the current top questions now; returns how many were warmed and failed."""
+        self._last_run = time.monotonic()
+        start = time.time()
+        questions = self._top_questions(self.top_n)
+        counts = {"warmed": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="prewarm") as pool:
+            for ok in pool.map(self._warm, questions):
+                counts["warmed" if ok else "failed"] += 1
+        with self._lock:
+            self._runs += 1
+            self._warmed += counts["warmed"]
+            self._failed += counts["failed"]
+            self._last_run_at = start
+            self._last_duration = time.time() - start
+        self.logger.info(f"Pre-warmed {counts['warmed']} of {len(questions)} frequent questions "
+                         f"in {self._last_duration:.1f}s")
+        return counts
+
+    def _warm(self, item: Dict[str, Any]) -> bool:
+        with metrics.span('prewarm', model=item['model_name']) as span:
+            try:
+                results = self._answer(item['question'], item['model_name'])
+            except Exception as e:
+                self.logger.info(f"Pre-warming {item['question']!r} failed: {e}")
+                span['outcome'] = 'failure'
+                return False
+            if not results['success']:
+                span['outcome'] = 'failure'
+            return results['success']
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "warmed": self._warmed,
+                "failed": self._failed,
+                "last_run_at": self._last_run_at,
+                "last_duration": round(self._last_duration, 2) if self._last_duration is not None else None,
+            }
@@ -0,0 +1,175 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*|#[^\n]*', re.S)
+_QUOTED = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`")
+_NAME = r'(?:`[^`]+`|[A-Za-z_][\w$]*)'
+_SELECT = re.compile(
+    r'\s*SELECT\b((?:\s+(?:ALL|DISTINCT|DISTINCTROW|HIGH_PRIORITY|STRAIGHT_JOIN|SQL_\w+))*)\s*', re.IGNORECASE
+)
+_COLUMN = re.compile(rf'(?:{_NAME}\s*\.\s*){{0,2}}({_NAME})')
+_STAR = re.compile(rf'(?:({_NAME}(?:\s*\.\s*{_NAME})?)\s*\.\s*)?\*')
+_ALIAS = re.compile(rf'\s(AS\s+)?({_NAME}|\'[^\']*\'|"[^"]*")$', re.IGNORECASE)
+_TABLE_REF = re.compile(rf'(?:^|,|\bJOIN\b)\s*({_NAME}(?:\s*\.\s*{_NAME})?)(?:\s+(?:AS\s+)?({_NAME}))?', re.IGNORECASE)
+_CLAUSE_END = re.compile(r'\b(?:WHERE|GROUP\s+BY|HAVING|WINDOW|ORDER\s+BY|LIMIT|FOR\s+UPDATE|FOR\s+SHARE|LOCK\s+IN)\b',
+                         re.IGNORECASE)
+_OUTPUT_REFERENCES = re.compile(r'\b(?:GROUP\s+BY|HAVING|WINDOW|ORDER\s+BY)\b', re.IGNORECASE)
+_BY_LIST = re.compile(r'\b(?:GROUP|ORDER)\s+BY\b(.*?)(?=\bHAVING\b|\bWINDOW\b|\bORDER\s+BY\b|\bLIMIT\b|\bWITH\s+ROLLUP\b|$)',
+                      re.IGNORECASE | re.S)
+_POSITION = re.compile(r'\s*\d+(?:\s+(?:ASC|DESC))?\s*', re.IGNORECASE)
+_UNSAFE = re.compile(r'\b(?:UNION|INTERSECT|EXCEPT|INTO|NATURAL|USING)\b', re.IGNORECASE)
+
+_NOT_ALIASES = {
+    'on', 'where', 'join', 'inner', 'left', 'right', 'outer', 'cross', 'straight_join', 'using', 'natural',
+    'group', 'order', 'having', 'limit', 'window', 'for', 'lock', 'use', 'force', 'ignore', 'partition',
+    'end', 'and', 'or', 'not', 'null', 'is', 'in', 'like', 'between', 'true', 'false', 'distinct', 'as',
+    'asc', 'desc', 'then', 'else', 'when', 'case', 'div', 'mod', 'xor', 'regexp', 'rlike', 'interval',
+    'binary', 'collate', 'escape', 'sounds',
+}
+
+
+def is_hidden_column(name: str) -> bool:
+    """Internal key columns are never shown or exported."""
+    name = name.lower()
+    return '_id' in name or '_pk' in name
+
+
+def _mask(query: str) -> str:
+    """Same-length copy of `query` with comments blanked and the insides of quotes replaced,
+    so keywords and punctuation can be found by position."""
+    masked = _COMMENT.sub(lambda match: ' ' * len(match.group()), query)
+    return _QUOTED.sub(lambda match: match.group()[0] + 'x' * (len(match.group()) - 2) + match.group()[-1], masked)
+
+
+def _top_level(masked: str) -> str:
+    """Blank everything inside parentheses, keeping the parentheses themselves."""
+    depth = 0
+    chars = []
+    for char in masked:
+        if char == ')':
+            depth -= 1
+        chars.append(char if depth == 0 or char in '()' else ' ')
+        if char == '(':
+            depth += 1
+    return ''.join(chars)
+
+
+def _unquote(name: str) -> str:
+    return name.strip().strip('`')
+
+
+def _split_items(top: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """Spans of the comma-separated items in `top[start:end]`, without surrounding whitespace."""
+    spans = []
+    for match in re.finditer(r'[^,]+', top[start:end]):
+        item = match.group()
+        lead = len(item) - len(item.lstrip())
+        spans.append((start + match.start() + lead, start + match.start() + len(item.rstrip())))
+    return spans
+
+
+def _output_name(text: str, item: str) -> Optional[str]:
+    """Name MySQL gives a select item, when it can be told without evaluating it."""
+    column = _COLUMN.fullmatch(item)
+    if column:
+        return _unquote(text[column.start(1):column.end(1)])
+    alias = _ALIAS.search(item)
+    if alias is None or alias.group(2).lower() in _NOT_ALIASES:
+        return None
+    if not alias.group(1):
+        # Without AS, only `<operand> name` is an alias; `a + b` or `x AND y` are not
+        before = item[:alias.start()].rstrip()
+        previous = re.search(r'(\w+)$', before)
+        if not before or not (before[-1] in ")`'\"" or previous and previous.group(1).lower() not in _NOT_ALIASES):
+            return None
+    return text[alias.start(2):alias.end(2)].strip('`\'"')
+
+
+def prune_hidden_columns(query: str, column_names: Callable[[Optional[str], str], Optional[List[str]]]) -> Optional[str]:
+    """Rewrite a generated SELECT so hidden `_id`/`_pk` columns are not fetched at all.
+
+    `*` and `t.*` are expanded with `column_names(schema, table)` and hidden columns are
+    removed from the outer select list. Returns None when there is nothing to remove or
+    the query cannot be rewritten safely (DISTINCT, set operations, CTEs, derived tables
+    under `*`, positional or by-name references to a removed column, ...); the caller
+    then runs the query as generated.
+    """
+    query = query.strip().rstrip(';').rstrip()
+    masked = _mask(query)
+    if ';' in masked:
+        return None
+    head = _SELECT.match(masked)
+    if head is None or re.search(r'\bDISTINCT(?:ROW)?\b', head.group(1), re.IGNORECASE):
+        return None
+    top = _top_level(masked)
+    if _UNSAFE.search(top):
+        return None
+    from_match = re.compile(r'\bFROM\b', re.IGNORECASE).search(top, head.end())
+    if from_match is None:
+        return None
+    end_match = _CLAUSE_END.search(top, from_match.end())
+    from_end = end_match.start() if end_match else len(top)
+    tables = None  # [(qualifier as written, alias or table name, columns)], resolved only if a star needs it
+
+    def resolve_tables():
+        resolved = []
+        from_clause = top[from_match.end():from_end]
+        if re.search(r'(?:^|,|\bJOIN\b)\s*\(', from_clause, re.IGNORECASE):
+            return None  # derived table or parenthesised join
+        for match in _TABLE_REF.finditer(from_clause):
+            reference = query[from_match.end() + match.start(1):from_match.end() + match.end(1)]
+            parts = [_unquote(part) for part in reference.split('.')]
+            schema, table = (parts[0], parts[1]) if len(parts) == 2 else (None, parts[0])
+            columns = column_names(schema, table)
+            if columns is None:
+                return None
+            alias = match.group(2)
+            if alias and alias.lower() not in _NOT_ALIASES:
+                alias = query[from_match.end() + match.start(2):from_match.end() + match.end(2)]
+                resolved.append((alias, _unquote(alias), columns))
+            else:
+                resolved.append((reference, table, columns))
+        return resolved or None
+
+    kept, dropped = [], []
+    for start, end in _split_items(top, head.end(), from_match.start()):
+        text, item = query[start:end], masked[start:end]
+        if not item:
+            return None
+        star = _STAR.fullmatch(item)
+        if star:
+            if tables is None:
+                tables = resolve_tables()
+                if tables is None:
+                    return None
+            qualifier = star.group(1) and _unquote(text[star.start(1):star.end(1)].split('.')[-1])
+            sources = [entry for entry in tables if qualifier is None or entry[1].lower() == qualifier.lower()]
+            if not sources:
+                return None
+            columns = [(prefix, column) for prefix, _, names in sources for column in names]
+            if not any(is_hidden_column(column) for _, column in columns):
+                kept.append(text)
+                continue
+            kept.extend(f"{prefix}.`{column}`" for prefix, column in columns if not is_hidden_column(column))
+            dropped.extend(column for _, column in columns if is_hidden_column(column))
+            continue
+
+        name = _output_name(text, item)
+        if name is not None and is_hidden_column(name):
+            dropped.append(name)
+        else:
+            kept.append(text)
+
+    if not dropped or not kept:
+        return None
+    references = _OUTPUT_REFERENCES.search(top, from_end)
+    if references:
+        for match in _BY_LIST.finditer(top, references.start()):
+            if any(_POSITION.fullmatch(part) for part in match.group(1).split(',')):
+                return None
+        later = query[references.start():]
+        for name in set(dropped):
+            # GROUP BY / HAVING / ORDER BY may refer to the removed output column by name
+            if re.search(rf'(?<![\w$]){re.escape(name)}(?![\w$])', later, re.IGNORECASE):
+                return None
+    return f"{query[:head.end()]}{', '.join(kept)} {query[from_match.start():]}"
@@ -0,0 +1,170 @@
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+
+def normalize_question(question: str) -> str:
+    return ' '.join(question.lower().split()).rstrip('?.! ')
+
+
+class QuestionCache:
+    """Question -> generated SQL cache backed by SQLite so all app processes share it."""
+
+    def __init__(self, path: str, logger: logging.Logger, ttl: float = 86400, max_entries: int = 1000):
+        self.path = path
+        self.logger = logger
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS question_cache (
+                    key TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    log_id TEXT,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS idx_question_cache_log_id ON question_cache (log_id)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_question_cache_last_access ON question_cache (last_access)")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS question_stats (
+                    key TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    asks INTEGER NOT NULL,
+                    last_asked REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _key(question: str, model_name: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{normalize_question(question)}".encode()).hexdigest()
+
+    def get(self, question: str, model_name: str) -> Optional[Dict[str, Any]]:
+        key = self._key(question, model_name)
+        now = time.time()
+        try:
+            with self._connect() as db:
+                row = db.execute(
+                    "SELECT query, log_id, created_at FROM question_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[2] > self.ttl:
+                    db.execute("DELETE FROM question_cache WHERE key = ?", (key,))
+                    row = None
+                    self._count('_evictions')
+                elif row:
+                    db.execute("UPDATE question_cache SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Question cache read failed: {e}")
+            row = None
+
+        if row is None:
+            self._count('_misses')
+            return None
+        self._count('_hits')
+        return {"query": row[0], "log_id": row[1], "age": now - row[2]}
+
+    def put(self, question: str, model_name: str, query: str, log_id):
+        now = time.time()
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO question_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self._key(question, model_name), normalize_question(question), model_name,
+                     query, None if log_id is None else str(log_id), now, now)
+                )
+                evicted = db.execute("DELETE FROM question_cache WHERE created_at < ?", (now - self.ttl,)).rowcount
+                evicted += db.execute(
+                    "DELETE FROM question_cache WHERE key NOT IN "
+                    "(SELECT key FROM question_cache ORDER BY last_access DESC LIMIT ?)",
+                    (self.max_entries,)
+                ).rowcount
+        except sqlite3.Error as e:
+            self.logger.warning(f"Question cache write failed: {e}")
+            return
+        if evicted:
+            self._count('_evictions', evicted)
+
+    def invalidate(self, question: str, model_name: str):
+        self._delete("DELETE FROM question_cache WHERE key = ?", (self._key(question, model_name),))
+
+    def invalidate_log_id(self, log_id):
+        """Drop every entry produced by `log_id`, e.g. after negative feedback."""
+        self._delete("DELETE FROM question_cache WHERE log_id = ?", (str(log_id),))
+
+    def record_ask(self, question: str, model_name: str):
+        """Count a user asking `question`; the most frequent ones are pre-warmed."""
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT INTO question_stats VALUES (?, ?, ?, 1, ?) ON CONFLICT(key) DO UPDATE SET "
+                    "asks = asks + 1, question = excluded.question, last_asked = excluded.last_asked",
+                    (self._key(question, model_name), ' '.join(question.split()), model_name, time.time())
+                )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Question stats write failed: {e}")
+
+    def top_questions(self, limit: int, lookback: float) -> List[Dict[str, Any]]:
+        """Most asked questions among those asked in the last `lookback` seconds."""
+        since = time.time() - lookback
+        try:
+            with self._connect() as db:
+                db.execute("DELETE FROM question_stats WHERE last_asked < ?", (since,))
+                rows = db.execute(
+                    "SELECT question, model_name, asks FROM question_stats ORDER BY asks DESC, last_asked DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Question stats read failed: {e}")
+            return []
+        return [{"question": row[0], "model_name": row[1], "asks": row[2]} for row in rows]
+
+    def _delete(self, sql: str, params: tuple):
+        try:
+            with self._connect() as db:
+                db.execute(sql, params)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Question cache invalidation failed: {e}")
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._connect() as db:
+                entries = db.execute("SELECT COUNT(*) FROM question_cache").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
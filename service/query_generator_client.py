@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from service.health import backoff_delay
+
+
+class QueryGeneratorClient:
+    """Keep-alive HTTP client for the query-generator API with timeouts and bounded retries."""
+
+    def __init__(self, base_url: str, logger: logging.Logger, connect_timeout: float = 3.05,
+                 read_timeout: float = 60.0, max_retries: int = 2, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, pool_size: int = 10):
+        self.base_url = base_url
+        self.logger = logger
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, endpoint: str, params: Dict[str, Any]) -> requests.Response:
+        """GET `endpoint`, retrying failed connects and 5xx responses with jitter.
+
+        A read timeout is not retried: the backend is already slow, and each retry would
+        wait for the full read timeout again.
+        """
+        url = f'{self.base_url}{endpoint}'
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, json=params, timeout=self.timeout)
+                if response.status_code < 500 or attempt >= self.max_retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except requests.ConnectionError as e:  # includes ConnectTimeout, not ReadTimeout
+                if attempt >= self.max_retries:
+                    raise
+                reason = str(e)
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            self.logger.warning(f"Request to {endpoint} failed ({reason}). Retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def generate_query(self, question: str, model_name: str) -> Optional[Dict[str, Any]]:
+        response = self.request('generate_query', {'question': question, 'model_name': model_name})
+        if response.status_code == 200:
+            body = response.json()
+            if 'query' in body:
+                return body
+        return None
+
+    def post_feedback(self, feedback: str, log_id) -> bool:
+        response = self.request('user_feedback', {'feedback': feedback, 'log_id': log_id})
+        return response.status_code == 200
+
+
+class FeedbackQueue:
+    """Posts feedback from a background worker so the thumbs-up/down click never waits on the API."""
+
+    def __init__(self, client: QueryGeneratorClient, logger: logging.Logger, max_size: int = 1000,
+                 batch_size: int = 20, max_attempts: int = 5):
+        self.client = client
+        self.logger = logger
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+        self._dropped = 0
+        self._worker = threading.Thread(target=self._run, name="feedback-poster", daemon=True)
+        self._worker.start()
+
+    def submit(self, feedback: str, log_id) -> bool:
+        try:
+            self._queue.put_nowait((feedback, log_id, 0))
+            return True
+        except queue.Full:
+            self._count('_dropped')
+            self.logger.warning(f"Feedback queue full, dropping feedback for log_id {log_id}")
+            return False
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            retry = []
+            for feedback, log_id, attempts in batch:
+                try:
+                    ok = self.client.post_feedback(feedback, log_id)
+                except Exception as e:
+                    self.logger.warning(f"Error posting feedback for log_id {log_id}: {e}")
+                    ok = False
+                if ok:
+                    self._count('_sent')
+                elif attempts + 1 < self.max_attempts:
+                    retry.append((feedback, log_id, attempts + 1))
+                else:
+                    self._count('_failed')
+                    self.logger.error(f"Giving up on feedback for log_id {log_id} after {attempts + 1} attempts")
+
+            for item in retry:
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    self._count('_dropped')
+            if retry:
+                time.sleep(backoff_delay(min(item[2] for item in retry), self.client.backoff_base,
+                                         self.client.backoff_max))
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "sent": self._sent,
+                "failed": self._failed,
+                "dropped": self._dropped,
+            }
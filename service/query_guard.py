@@ -0,0 +1,122 @@
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+_LEADING_SELECT = re.compile(r'^(\s*\(?\s*SELECT)\b', re.IGNORECASE)
+
+# Codes MySQL uses for statements stopped by MAX_EXECUTION_TIME and KILL QUERY
+ER_QUERY_TIMEOUT = 3024
+ER_QUERY_INTERRUPTED = 1317
+
+
+def has_max_execution_time(query: str) -> bool:
+    return 'MAX_EXECUTION_TIME' in query.upper()
+
+
+def add_max_execution_time(query: str, timeout: float) -> str:
+    """Add a MAX_EXECUTION_TIME optimizer hint to a plain SELECT so the server stops it too."""
+    if has_max_execution_time(query):
+        return query
+    return _LEADING_SELECT.sub(rf'\1 /*+ MAX_EXECUTION_TIME({int(timeout * 1000)}) */', query, count=1)
+
+
+class RunningQuery:
+    def __init__(self, registry: 'QueryRegistry', thread_id: int, timeout: float, token: Optional[str],
+                 kill: Optional[Callable[[int], None]] = None, grace: float = 0):
+        self._registry = registry
+        self.thread_id = thread_id
+        self.kill = kill
+        self.timeout = timeout
+        self.token = token
+        self.reason = None  # 'timeout' or 'cancelled' once the statement was killed
+        self.started_at = time.monotonic()
+        self._timer = threading.Timer(timeout + grace, registry._kill, (self, 'timeout'))
+        self._timer.daemon = True
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def finish(self):
+        self._timer.cancel()
+        self._registry._unregister(self)
+
+
+class QueryRegistry:
+    """Tracks running statements so they can be cancelled, or killed once over their time budget.
+
+    Statements the server stops itself (MAX_EXECUTION_TIME) are only killed `kill_grace`
+    seconds after their budget, so the kill cannot race the server's own timeout.
+    """
+
+    def __init__(self, kill: Callable[[int], None], logger: logging.Logger, max_cancelled: int = 1000,
+                 kill_grace: float = 5):
+        self._kill_query = kill
+        self.logger = logger
+        self.max_cancelled = max_cancelled
+        self.kill_grace = kill_grace
+        self._lock = threading.Lock()
+        self._running: Dict[str, RunningQuery] = {}
+        self._cancelled = OrderedDict()
+        self._timeouts = 0
+        self._cancellations = 0
+
+    def start(self, thread_id: int, timeout: float, token: Optional[str] = None,
+              kill: Optional[Callable[[int], None]] = None, server_limit: bool = False) -> RunningQuery:
+        """Track a statement; `kill` overrides the registry's KILL QUERY, e.g. for another server.
+
+        `server_limit` says the statement carries a MAX_EXECUTION_TIME hint.
+        """
+        running = RunningQuery(self, thread_id, timeout, token, kill, grace=self.kill_grace if server_limit else 0)
+        with self._lock:
+            self._running[token or f"thread-{thread_id}"] = running
+        running._timer.start()
+        return running
+
+    def cancel(self, token: str) -> bool:
+        """Cancel the statement running under `token`, and any later one started with it."""
+        with self._lock:
+            self._cancelled[token] = True
+            while len(self._cancelled) > self.max_cancelled:
+                self._cancelled.popitem(last=False)
+            running = self._running.get(token)
+        if running is None:
+            return False
+        self._kill(running, 'cancelled')
+        return True
+
+    def is_cancelled(self, token: Optional[str]) -> bool:
+        return token is not None and token in self._cancelled
+
+    def _unregister(self, running: RunningQuery):
+        with self._lock:
+            key = running.token or f"thread-{running.thread_id}"
+            if self._running.get(key) is running:
+                del self._running[key]
+
+    def _kill(self, running: RunningQuery, reason: str):
+        with self._lock:
+            key = running.token or f"thread-{running.thread_id}"
+            if running.reason is not None or self._running.get(key) is not running:
+                return
+            running.reason = reason
+            if reason == 'timeout':
+                self._timeouts += 1
+            else:
+                self._cancellations += 1
+        self.logger.warning(f"Killing query on connection {running.thread_id} ({reason}, {running.elapsed:.1f}s)")
+        try:
+            (running.kill or self._kill_query)(running.thread_id)
+        except Exception as e:
+            self.logger.error(f"KILL QUERY {running.thread_id} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "timeouts": self._timeouts,
+                "cancellations": self._cancellations,
+            }
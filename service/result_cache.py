@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_sql(query: str) -> str:
+    return ' '.join(query.split()).rstrip('; ')
+
+
+def estimate_row_size(row) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in values)
+
+
+def estimate_size(result: Dict[str, Any]) -> int:
+    """Approximate memory held by an execution result, in bytes."""
+    size = sys.getsizeof(result) + sum(sys.getsizeof(column) for column in result.get("columns", []))
+    rows = result.get("rows", [])
+    size += sys.getsizeof(rows) + sum(estimate_row_size(row) for row in rows)
+    if result.get("frame") is not None:
+        size += int(result["frame"].memory_usage(deep=True).sum())
+    return size
+
+
+class ResultCache:
+    """LRU cache of query results bounded by a TTL and a memory budget in bytes."""
+
+    def __init__(self, ttl: float = 300, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size, stored_at, ttl)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        key = normalize_sql(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[2] > entry[3]:
+                self._remove(key)
+                self._evictions += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        result, _, stored_at, _ = entry
+        return {**result, "cached": True, "cached_age": round(now - stored_at, 1)}
+
+    def put(self, query: str, result: Dict[str, Any], ttl: Optional[float] = None):
+        """Store `result`; `ttl` overrides the cache default for this entry."""
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        key = normalize_sql(query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.time(), self.ttl if ttl is None else ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
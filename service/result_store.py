@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from service.result_cache import estimate_size
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DATA_KEYS = ('rows', 'frame', 'columns')
+
+
+class _Entry:
+    __slots__ = ('session_id', 'result', 'meta', 'size', 'path', 'spilling')
+
+    def __init__(self, session_id: str, result: Dict[str, Any], size: int):
+        self.session_id = session_id
+        self.result = result  # None while spilled
+        self.meta = {key: value for key, value in result.items() if key not in DATA_KEYS}
+        self.size = size
+        self.path = None
+        self.spilling = False
+
+
+class ResultStore:
+    """Results held for open sessions, within one memory budget for the whole process.
+
+    The most recently viewed results stay in memory; older ones are written to disk
+    (Parquet when pyarrow is available, pickle otherwise) and read back on the next
+    `get`. A session's results are dropped once it has been gone for `session_grace`
+    seconds, as reported by `is_active(session_id)`.
+    """
+
+    def __init__(self, directory: str, logger: logging.Logger, max_bytes: int = 512 * 1024 * 1024,
+                 is_active: Optional[Callable[[str], bool]] = None, session_grace: float = 120,
+                 sweep_interval: float = 30):
+        self.directory = directory
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.session_grace = session_grace
+        self._is_active = is_active
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()  # handle -> entry, least recently used first
+        self._sessions: Dict[str, set] = {}  # session -> handles
+        self._gone_since: Dict[str, float] = {}
+        self._resident_bytes = 0
+        self._spills = 0
+        self._reloads = 0
+        self._sessions_ended = 0
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            # Spill files of a previous process are unreachable
+            if entry.is_file() and entry.name.endswith(('.parquet', '.pickle')):
+                os.remove(entry.path)
+        self._stop_event = threading.Event()
+        if is_active is not None:
+            self._thread = threading.Thread(target=self._sweep_loop, args=(sweep_interval,), name="result-store-sweeper",
+                                            daemon=True)
+            self._thread.start()
+
+    def put(self, session_id: str, result: Dict[str, Any]) -> str:
+        """Keep `result` for `session_id` in place of its previous one; returns the handle to `get` it by."""
+        handle = uuid.uuid4().hex
+        entry = _Entry(session_id, result, estimate_size(result))
+        with self._lock:
+            replaced = self._remove(self._sessions.pop(session_id, set()))
+            self._entries[handle] = entry
+            self._sessions[session_id] = {handle}
+            self._resident_bytes += entry.size
+        self._delete_files(replaced)
+        self._enforce_budget(handle)
+        return handle
+
+    def get(self, handle: str) -> Optional[Dict[str, Any]]:
+        """The result behind `handle`, read back from disk if it was spilled; None once dropped."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            self._entries.move_to_end(handle)
+            if entry.result is not None:
+                return entry.result
+            path = entry.path
+
+        try:
+            frame = self._read(path)
+        except OSError:
+            return None  # dropped while reading
+        result = dict(entry.meta, frame=frame, columns=list(frame.columns))
+        with self._lock:
+            if handle in self._entries and entry.result is None:
+                entry.result = result
+                entry.size = estimate_size(result)
+                self._resident_bytes += entry.size
+                self._reloads += 1
+            result = entry.result
+        self._enforce_budget(handle)
+        return result
+
+    def _enforce_budget(self, keep: str):
+        while True:
+            with self._lock:
+                if self._resident_bytes <= self.max_bytes:
+                    return
+                victim = next((
+                    (handle, entry) for handle, entry in self._entries.items()
+                    if handle != keep and entry.result is not None and not entry.spilling
+                ), None)
+                if victim is None:
+                    return
+                handle, entry = victim
+                entry.spilling = True
+                result = entry.result
+            try:
+                if entry.path is None:
+                    entry.path = self._write(handle, result)
+            except Exception as e:
+                self.logger.warning(f"Could not spill result {handle} to disk: {e}")
+                with self._lock:
+                    entry.spilling = False
+                return
+            with self._lock:
+                entry.spilling = False
+                if handle in self._entries and entry.result is result:
+                    entry.result = None
+                    self._resident_bytes -= entry.size
+                    self._spills += 1
+
+    def _write(self, handle: str, result: Dict[str, Any]) -> str:
+        frame = result['frame'] if result.get('frame') is not None else pd.DataFrame(result['rows'], columns=result['columns'])
+        if pq is not None:
+            path = os.path.join(self.directory, f"{handle}.parquet")
+            try:
+                frame.to_parquet(path, index=False)
+                return path
+            except Exception:
+                pass  # mixed-type object columns; pickle keeps them as they are
+        path = os.path.join(self.directory, f"{handle}.pickle")
+        frame.to_pickle(path)
+        return path
+
+    def _read(self, path: str) -> pd.DataFrame:
+        if path.endswith('.parquet'):
+            return pq.read_table(path, memory_map=True).to_pandas()
+        return pd.read_pickle(path)
+
+    def drop_session(self, session_id: str):
+        """Forget every result kept for `session_id` and delete its spill files."""
+        with self._lock:
+            entries = self._remove(self._sessions.pop(session_id, set()))
+            self._gone_since.pop(session_id, None)
+            self._sessions_ended += 1
+        self._delete_files(entries)
+
+    def _remove(self, handles) -> list:
+        entries = [self._entries.pop(handle) for handle in handles if handle in self._entries]
+        for entry in entries:
+            if entry.result is not None:
+                self._resident_bytes -= entry.size
+        return entries
+
+    def _delete_files(self, entries):
+        for entry in entries:
+            if entry.path is not None:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _sweep_loop(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                self.logger.warning(f"Result store sweep failed: {e}")
+
+    def sweep(self):
+        """Drop the results of sessions that have been gone for longer than the grace period."""
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions)
+        for session_id in sessions:
+            if self._is_active(session_id):
+                self._gone_since.pop(session_id, None)
+            elif now - self._gone_since.setdefault(session_id, now) >= self.session_grace:
+                self.drop_session(session_id)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spilled = [entry for entry in self._entries.values() if entry.result is None]
+            return {
+                "sessions": len(self._sessions),
+                "entries": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "spilled_entries": len(spilled),
+                "max_bytes": self.max_bytes,
+                "spills": self._spills,
+                "reloads": self._reloads,
+                "sessions_ended": self._sessions_ended,
+            }
@@ -0,0 +1,312 @@
+import difflib
+import re
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SYSTEM_SCHEMAS = ('information_schema', 'mysql', 'performance_schema', 'sys')
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*|#[^\n]*', re.S)
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NAME = r'(?:`[^`]+`|[A-Za-z_][\w$]*)'
+_TABLE_REF = re.compile(
+    rf'\b(?:FROM|JOIN)\s+({_NAME}(?:\s*\.\s*{_NAME})?)(?:\s+(?:AS\s+)?({_NAME}))?', re.IGNORECASE
+)
+# Where a FROM list ends, at the depth of its FROM
+_FROM_LIST_TOKEN = re.compile(
+    r'[(),]|\b(?:WHERE|GROUP|HAVING|ORDER|LIMIT|WINDOW|UNION|INTERSECT|EXCEPT|FOR|LOCK|INTO)\b', re.IGNORECASE
+)
+_COMMA_TABLE_REF = re.compile(rf'\s*({_NAME}(?:\s*\.\s*{_NAME})?)(?:\s+(?:AS\s+)?({_NAME}))?', re.IGNORECASE)
+_COLLATION = re.compile(rf'\bCOLLATE\s+{_NAME}', re.IGNORECASE)
+_QUALIFIED = re.compile(rf'(?<![\w.`])({_NAME})\s*\.\s*({_NAME})(?:\s*\.\s*({_NAME}))?(?!\s*[.(])')
+_CTE_NAME = re.compile(rf'(?:\bWITH(?:\s+RECURSIVE)?|,)\s*({_NAME})\s*(?:\([^)]*\)\s*)?AS\s*\(', re.IGNORECASE)
+# Functions whose arguments use FROM without naming a table
+_FROM_FUNCTION = re.compile(r'\b(?:EXTRACT|TRIM|SUBSTRING|SUBSTR|POSITION|OVERLAY)\s*\(', re.IGNORECASE)
+_WHERE_CLAUSE = re.compile(r'\bWHERE\b(.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bHAVING\b|\bLIMIT\b|\bWINDOW\b|$)',
+                           re.IGNORECASE | re.S)
+_COMPARED = re.compile(rf'(?<![\w.`])({_NAME})\s*(?:=|<=>|<>|!=|<=|>=|<|>|\bNOT\s+|\bLIKE\b|\bIN\b|\bBETWEEN\b|\bIS\b|\bREGEXP\b)',
+                       re.IGNORECASE)
+
+_KEYWORDS = {
+    'where', 'join', 'inner', 'left', 'right', 'outer', 'cross', 'natural', 'straight_join', 'on', 'using',
+    'group', 'order', 'having', 'limit', 'union', 'window', 'for', 'lock', 'into', 'and', 'or', 'not',
+    'null', 'is', 'in', 'like', 'between', 'exists', 'case', 'when', 'then', 'else', 'end', 'select',
+    'true', 'false', 'interval', 'as', 'partition', 'offset', 'with', 'distinct', 'all', 'any', 'some',
+    'binary', 'collate', 'escape', 'div', 'mod', 'xor', 'regexp', 'rlike', 'sounds', 'current_date',
+    'current_time', 'current_timestamp', 'now', 'dual', 'microsecond', 'second', 'minute', 'hour', 'day',
+    'week', 'month', 'quarter', 'year',
+}
+
+
+def _unquote(name: str) -> str:
+    return name.strip().strip('`').lower()
+
+
+def _strip_literals(query: str) -> str:
+    query = _COMMENT.sub(' ', query)
+    return _STRING_LITERAL.sub("''", query)
+
+
+def _blank_from_functions(sql: str) -> str:
+    """Blank the calls of functions that use FROM in their arguments, nested calls included."""
+    chars = list(sql)
+    position = 0
+    while True:
+        match = _FROM_FUNCTION.search(sql, position)
+        if match is None:
+            return ''.join(chars)
+        depth = 0
+        end = len(sql)
+        for index in range(match.end() - 1, len(sql)):
+            if sql[index] == '(':
+                depth += 1
+            elif sql[index] == ')':
+                depth -= 1
+                if depth == 0:
+                    end = index + 1
+                    break
+        chars[match.start():end] = ' ' * (end - match.start())
+        position = end
+
+
+def _from_list_commas(sql: str) -> List[int]:
+    """Positions of the commas separating table references in FROM lists (`FROM a x, b y`)."""
+    commas = []
+    for keyword in re.finditer(r'\bFROM\b', sql, re.IGNORECASE):
+        depth = 0
+        for token in _FROM_LIST_TOKEN.finditer(sql, keyword.end()):
+            char = token.group()
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth < 0:
+                    break  # end of the subquery this FROM belongs to
+            elif depth == 0:
+                if char != ',':
+                    break
+                commas.append(token.start())
+    return sorted(set(commas))
+
+
+def _table_refs(sql: str) -> List[Tuple[str, Optional[str], Tuple[int, int]]]:
+    """(table name, alias, span of the name) for tables after FROM, JOIN and FROM-list commas."""
+    refs = [(match.group(1), match.group(2), match.span(1)) for match in _TABLE_REF.finditer(sql)]
+    for comma in _from_list_commas(sql):
+        match = _COMMA_TABLE_REF.match(sql, comma + 1)
+        if match:  # not a derived table
+            refs.append((match.group(1), match.group(2), match.span(1)))
+    return refs
+
+
+class _Index:
+    """One immutable snapshot of the catalog; refreshes swap in a new one."""
+
+    def __init__(self, columns, indexes, names=None):
+        self.columns: Dict[Tuple[str, str], Dict[str, str]] = columns  # (schema, table) -> {column: data_type}
+        self.names: Dict[Tuple[str, str], List[str]] = names or {}  # (schema, table) -> column names as declared
+        self.indexes: Dict[Tuple[str, str], Dict[str, List[str]]] = indexes  # (schema, table) -> {index: [columns]}
+        self.tables_by_name = defaultdict(list)  # table -> schemas containing it
+        for schema, table in columns:
+            self.tables_by_name[table].append(schema)
+        self.all_columns = {column for table_columns in columns.values() for column in table_columns}
+
+    def resolve(self, schema: Optional[str], table: str) -> Optional[Tuple[str, str]]:
+        if schema:
+            key = (schema, table)
+            return key if key in self.columns else None
+        schemas = self.tables_by_name.get(table, [])
+        return (schemas[0], table) if len(schemas) == 1 else None
+
+    def known(self, schema: Optional[str], table: str) -> bool:
+        return (schema, table) in self.columns if schema else table in self.tables_by_name
+
+
+class SchemaCatalog:
+    """In-memory index of tables, columns, types and indexes from information_schema.
+
+    Loaded in the background at startup and refreshed every `ttl` seconds, so generated
+    SQL can be checked for unknown tables and columns without a round trip to MySQL.
+    Until the first load completes every query is allowed through.
+    """
+
+    def __init__(self, load: Callable[[], Dict[str, List[Dict[str, Any]]]], logger: logging.Logger,
+                 ttl: float = 600, retry_interval: float = 30):
+        self._load = load
+        self.logger = logger
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._index = _Index({}, {})
+        self._loaded_at = None
+        self._load_seconds = None
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._checks = 0
+        self._rejections = 0
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._refresh_loop, name="schema-catalog", daemon=True)
+        self._thread.start()
+
+    @property
+    def loaded(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+                delay = self.ttl
+            except Exception as e:
+                with self._lock:
+                    self._refresh_failures += 1
+                self.logger.warning(f"Schema catalog refresh failed, keeping the previous catalog: {e}")
+                delay = self.retry_interval
+            if self._stop_event.wait(delay):
+                return
+
+    def refresh(self):
+        """Reload the catalog and swap it in atomically."""
+        start = time.perf_counter()
+        catalog = self._load()
+        columns = defaultdict(dict)
+        names = defaultdict(list)
+        for row in catalog['columns']:
+            key = (row['table_schema'].lower(), row['table_name'].lower())
+            columns[key][row['column_name'].lower()] = row['data_type']
+            names[key].append(row['column_name'])
+        indexes = defaultdict(lambda: defaultdict(list))
+        for row in sorted(catalog.get('indexes', []), key=lambda row: row['seq_in_index']):
+            key = (row['table_schema'].lower(), row['table_name'].lower())
+            indexes[key][row['index_name']].append(row['column_name'].lower())
+        index = _Index(dict(columns), {key: dict(value) for key, value in indexes.items()}, dict(names))
+
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.time()
+            self._load_seconds = time.perf_counter() - start
+            self._refreshes += 1
+        self._ready.set()
+        self.logger.info(f"Schema catalog loaded: {len(columns)} tables in {self._load_seconds:.2f}s")
+
+    def columns(self, schema: Optional[str], table: str) -> Optional[Dict[str, str]]:
+        """Columns of `schema.table` in ordinal order, or None if unknown (or ambiguous without a schema)."""
+        index = self._index
+        resolved = index.resolve(_unquote(schema) if schema else None, _unquote(table))
+        return None if resolved is None else index.columns[resolved]
+
+    def column_names(self, schema: Optional[str], table: str) -> Optional[List[str]]:
+        """Column names of `schema.table` with their declared case, in ordinal order, or None if unknown."""
+        index = self._index
+        resolved = index.resolve(_unquote(schema) if schema else None, _unquote(table))
+        return None if resolved is None else index.names[resolved]
+
+    def indexes(self, schema: Optional[str], table: str) -> Optional[Dict[str, List[str]]]:
+        index = self._index
+        resolved = index.resolve(_unquote(schema) if schema else None, _unquote(table))
+        return None if resolved is None else index.indexes.get(resolved, {})
+
+    def check(self, query: str) -> List[str]:
+        """Problems with table and column names in `query`; empty when it looks valid.
+
+        Only references that can be resolved with certainty are checked: table names
+        after FROM, JOIN and FROM-list commas, qualified `alias.column` references and,
+        for single-table queries, bare columns compared in the WHERE clause.
+        """
+        if not self.loaded:
+            return []
+        index = self._index
+        sql = _blank_from_functions(_strip_literals(query))
+        ctes = {_unquote(match.group(1)) for match in _CTE_NAME.finditer(sql)}
+        problems = []
+        aliases: Dict[str, Tuple[str, str]] = {}
+        table_spans = []
+        tables = []
+
+        comma_joined = bool(_from_list_commas(sql))
+        for name, alias, span in _table_refs(sql):
+            parts = [_unquote(part) for part in name.split('.')]
+            schema, table = (parts[0], parts[1]) if len(parts) == 2 else (None, parts[0])
+            table_spans.append(span)
+            if schema is None and table in ctes or table == 'dual':
+                continue
+            if not index.known(schema, table):
+                # `FROM x` inside a function we did not blank out names a column, not a table
+                if schema is None and table in index.all_columns:
+                    continue
+                problems.append(self._unknown_table(index, schema, table))
+                continue
+            resolved = index.resolve(schema, table)
+            tables.append(resolved)
+            names = [table] + ([_unquote(alias)] if alias and _unquote(alias) not in _KEYWORDS else [])
+            for name in names:
+                # A name bound to different tables in different scopes is left unchecked
+                aliases[name] = resolved if aliases.get(name, resolved) == resolved else None
+
+        masked = list(sql)
+        for start, end in table_spans:
+            masked[start:end] = ' ' * (end - start)
+        masked = _COLLATION.sub(lambda match: ' ' * len(match.group()), ''.join(masked))
+        for match in _QUALIFIED.finditer(masked):
+            names = [_unquote(name) for name in match.groups() if name]
+            if len(names) == 3:
+                resolved, column = index.resolve(names[0], names[1]), names[2]
+            else:
+                resolved, column = aliases.get(names[0]), names[1]
+            if resolved is None or column == '*':
+                continue
+            if column not in index.columns[resolved]:
+                problems.append(self._unknown_column(index, column, resolved, match.group(0)))
+
+        single_table = (
+            len(tables) == 1 and tables[0] is not None and not ctes and not comma_joined
+            and len(re.findall(r'\bSELECT\b', sql, re.IGNORECASE)) == 1
+        )
+        if single_table:
+            where = _WHERE_CLAUSE.search(masked)
+            if where:
+                for match in _COMPARED.finditer(where.group(1)):
+                    column = _unquote(match.group(1))
+                    if column in _KEYWORDS or column in aliases:
+                        continue
+                    if column not in index.columns[tables[0]]:
+                        problems.append(self._unknown_column(index, column, tables[0], match.group(1)))
+
+        problems = list(dict.fromkeys(problems))
+        with self._lock:
+            self._checks += 1
+            if problems:
+                self._rejections += 1
+        return problems
+
+    def _unknown_table(self, index: _Index, schema: Optional[str], table: str) -> str:
+        name = f"{schema}.{table}" if schema else table
+        candidates = [f"{s}.{t}" if schema else t for s, t in index.columns if schema in (None, s)]
+        suggestion = difflib.get_close_matches(name, candidates, n=1)
+        return f"Unknown table '{name}'" + (f" (did you mean '{suggestion[0]}'?)" if suggestion else "")
+
+    def _unknown_column(self, index: _Index, column: str, table: Tuple[str, str], reference: str) -> str:
+        suggestion = difflib.get_close_matches(column, list(index.columns[table]), n=1)
+        return (f"Unknown column '{reference.strip()}' in table '{table[0]}.{table[1]}'"
+                + (f" (did you mean '{suggestion[0]}'?)" if suggestion else ""))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tables": len(self._index.columns),
+                "loaded_at": self._loaded_at,
+                "load_seconds": round(self._load_seconds, 4) if self._load_seconds is not None else None,
+                "refreshes": self._refreshes,
+                "refresh_failures": self._refresh_failures,
+                "checks": self._checks,
+                "rejections": self._rejections,
+            }
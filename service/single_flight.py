@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from service.metrics import metrics
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    Callers that arrive while a call for the same key is running wait for it and get
+    its result, or its exception re-raised, instead of doing the work again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._failed = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return `(result, shared)`; `shared` is True when another caller's run produced it."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            start = time.perf_counter()
+            try:
+                return future.result(), True
+            finally:
+                metrics.observe(f'coalesced_{self.name}', time.perf_counter() - start,
+                                'error' if future.exception() else 'ok')
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                self._failed += 1
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+            }
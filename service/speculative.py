@@ -0,0 +1,126 @@
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def is_valid_candidate(response: Optional[Dict[str, Any]]) -> bool:
+    """Cheap local checks on a generated query before it is sent to MySQL."""
+    if not response or not response.get('query'):
+        return False
+    query = response['query'].strip().lstrip('(').lstrip()
+    if 'i don\'t know' in query.lower():
+        return False
+    return query[:6].upper() == 'SELECT' or query[:4].upper() == 'WITH'
+
+
+class ModelStats:
+    """Per-model generation latency, validity and win counts for tuning speculative mode."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._valid = defaultdict(int)
+        self._wins = defaultdict(int)
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def record_response(self, model: str, latency: float, valid: bool):
+        with self._lock:
+            self._requests[model] += 1
+            self._latencies[model].append(latency)
+            if valid:
+                self._valid[model] += 1
+
+    def record_win(self, model: str):
+        with self._lock:
+            self._wins[model] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for model, requests in self._requests.items():
+                latencies = sorted(self._latencies[model])
+                result[model] = {
+                    "requests": requests,
+                    "valid": self._valid[model],
+                    "wins": self._wins[model],
+                    "win_rate": round(self._wins[model] / requests, 4),
+                    "latency_p50": round(latencies[len(latencies) // 2], 3),
+                    "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                }
+            return result
+
+
+class SpeculativeGenerator:
+    """Requests candidates from several models at once and executes the first one that succeeds."""
+
+    def __init__(self, generate: Callable[[str, str], Optional[Dict[str, Any]]], logger: logging.Logger,
+                 max_workers: int = 8):
+        self._generate = generate
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self.model_stats = ModelStats()
+
+    def _timed_generate(self, question: str, model: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        start_time = time.time()
+        try:
+            response = self._generate(question, model)
+        except Exception as e:
+            self.logger.warning(f"Speculative generation with {model} failed: {e}")
+            response = None
+        return response, time.time() - start_time
+
+    def run(self, question: str, models: List[str], samples: int,
+            execute: Callable[[str], Dict[str, Any]],
+            validate: Callable[[Optional[Dict[str, Any]]], bool] = is_valid_candidate) -> Dict[str, Any]:
+        """Return the first candidate whose query executes, or the last failure.
+
+        Candidates are validated and executed in arrival order. Requests that have
+        not started yet are cancelled once a winner is found; in-flight ones finish
+        in the background and are ignored.
+        """
+        futures = {}
+        for model in models:
+            for _ in range(samples):
+                futures[self._executor.submit(self._timed_generate, question, model)] = model
+
+        queries_attempted = []
+        outcome = {'success': False, 'execution_result': {}, 'query': None, 'log_id': None, 'model': None}
+        said_dont_know = False
+        try:
+            for future in as_completed(futures):
+                model = futures[future]
+                response, latency = future.result()
+                valid = validate(response)
+                self.model_stats.record_response(model, latency, valid)
+                if response and 'i don\'t know' in (response.get('query') or '').lower():
+                    said_dont_know = True
+                if not valid:
+                    continue
+
+                execution_result = execute(response['query'])
+                query = execution_result.get('executed_query', response['query'])
+                queries_attempted.append((len(queries_attempted) + 1, query))
+                outcome.update(execution_result=execution_result, query=query,
+                               log_id=response.get('log_id'), model=model)
+                if 'error' not in execution_result:
+                    self.model_stats.record_win(model)
+                    outcome['success'] = True
+                    break
+                if execution_result.get('error_type') in ('timeout', 'cancelled'):
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if not queries_attempted:
+            if said_dont_know:
+                raise Exception("I don't know")
+            raise Exception("No model returned a usable query")
+        outcome['queries_attempted'] = queries_attempted
+        return outcome
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.model_stats.stats()
@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from service.schema_catalog import SchemaCatalog
+
+COLUMNS = {
+    ('loyalty', 'companies'): ['company_id', 'name', 'country'],
+    ('loyalty', 'transactions'): ['transaction_id', 'company_id', 'amount', 'created_at'],
+}
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    rows = [
+        {'table_schema': schema, 'table_name': table, 'column_name': column, 'data_type': 'varchar'}
+        for (schema, table), columns in COLUMNS.items() for column in columns
+    ]
+    catalog = SchemaCatalog(lambda: {'columns': rows}, logger=logging.getLogger(__name__))
+    assert catalog.wait_loaded(timeout=5)
+    yield catalog
+    catalog.stop()
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT * FROM loyalty.companies c, loyalty.transactions t WHERE c.company_id = t.company_id AND amount > 100",
+    "SELECT * FROM loyalty.companies, loyalty.transactions WHERE country = 'FR' AND amount > 100",
+    "SELECT c.name FROM loyalty.companies AS c, (SELECT company_id FROM loyalty.transactions) t WHERE amount > 1",
+    "SELECT name FROM loyalty.companies WHERE name COLLATE utf8mb4_bin = 'Acme'",
+    "SELECT name FROM loyalty.companies WHERE name = 'Acme' COLLATE utf8mb4_bin AND country = 'FR'",
+    "SELECT name FROM loyalty.companies WHERE company_id IN (SELECT company_id FROM loyalty.transactions, loyalty.companies)",
+    "SELECT amount FROM loyalty.transactions WHERE EXTRACT(YEAR FROM created_at) = EXTRACT(YEAR FROM CURDATE()) - 1",
+    "SELECT TRIM(LEADING '0' FROM LOWER(name)) FROM loyalty.companies WHERE country = 'FR'",
+])
+def test_valid_queries_pass(catalog, query):
+    assert catalog.check(query) == []
+
+
+def test_comma_joined_tables_are_checked(catalog):
+    problems = catalog.check("SELECT * FROM loyalty.companies c, loyalty.transactons t WHERE c.company_id = t.company_id")
+    assert problems == ["Unknown table 'loyalty.transactons' (did you mean 'loyalty.transactions'?)"]
+
+
+def test_comma_join_aliases_resolve(catalog):
+    problems = catalog.check("SELECT t.amout FROM loyalty.companies c, loyalty.transactions t")
+    assert problems == ["Unknown column 't.amout' in table 'loyalty.transactions' (did you mean 'amount'?)"]
+
+
+def test_single_table_bare_columns_are_still_checked(catalog):
+    problems = catalog.check("SELECT name FROM loyalty.companies WHERE amount > 100")
+    assert len(problems) == 1 and problems[0].startswith("Unknown column 'amount' in table 'loyalty.companies'")